@@ -0,0 +1,96 @@
+import calendar
+from datetime import date
+
+import numpy as np
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class Reports:
+    # Every report is a slice of one (month x category) grid of cent totals per record
+    # type, built from the ledger columns with a few whole-array passes: day ordinals to
+    # month numbers, one flat cell index, one weighted bincount per type. The columns
+    # are copied up front, so the ledger can keep changing while reports are computed.
+    def __init__(self, records, today=None):
+        self.today = today or date.today()
+        self.current = (self.today.year - 1970) * 12 + self.today.month - 1
+        self.categories = list(records.categories)
+        cents = np.array(records.cents, dtype=np.int64)
+        days = np.array(records.days, dtype=np.int64)
+        tids = np.array(records.type_ids, dtype=np.uint8)
+        cids = np.array(records.cat_ids, dtype=np.int64)
+        months = (days - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        self.first = min(int(months.min()), self.current) if len(months) else self.current
+        self.last = max(int(months.max()), self.current) if len(months) else self.current
+        self.n_months = self.last - self.first + 1
+        n_cats = len(self.categories)
+        cells = (months - self.first) * n_cats + cids
+        # float64 weights are exact for integer cents up to 2**53, far beyond any ledger total.
+        self.grids = {}
+        for rtype, t in records.type_index.items():
+            sel = tids == t
+            self.grids[rtype] = np.bincount(cells[sel], weights=cents[sel], minlength=self.n_months * n_cats).round().astype(np.int64).reshape(self.n_months, n_cats)
+
+    def grid(self, rtype="Expense"):
+        g = self.grids.get(rtype)
+        return g if g is not None else np.zeros((self.n_months, len(self.categories)), np.int64)
+
+    def span(self, rtype, lo, hi):
+        # Per-category cents for months lo..hi inclusive, clipped to the ledger's range.
+        lo, hi = max(lo, self.first) - self.first, min(hi, self.last) - self.first
+        g = self.grid(rtype)
+        return g[lo:hi + 1].sum(axis=0) if lo <= hi else np.zeros(len(self.categories), np.int64)
+
+    def _compare(self, cur, prev):
+        # [(category, current, previous, change %)], biggest absolute movers first;
+        # change is None where there is nothing to compare against.
+        keep = np.flatnonzero((cur != 0) | (prev != 0))
+        keep = keep[np.argsort(-np.abs(cur[keep] - prev[keep]), kind="stable")]
+        return [(self.categories[i], float(cur[i] / 100), float(prev[i] / 100), float((cur[i] - prev[i]) / prev[i] * 100) if prev[i] else None) for i in keep]
+
+    def month_over_month(self, rtype="Expense", month=None):
+        m = self.current if month is None else month
+        return self._compare(self.span(rtype, m, m), self.span(rtype, m - 1, m - 1))
+
+    def year_over_year(self, rtype="Expense", month=None):
+        # Year to date through `month` against the same months a year earlier.
+        m = self.current if month is None else month
+        start = m - m % 12
+        return self._compare(self.span(rtype, start, m), self.span(rtype, start - 12, m - 12))
+
+    def rolling(self, rtype="Expense", window=3):
+        # Trailing `window`-month mean per category for every month (months x categories).
+        c = np.cumsum(np.pad(self.grid(rtype), ((1, 0), (0, 0))), axis=0)
+        n = np.arange(1, self.n_months + 1)
+        lo = np.maximum(n - window, 0)
+        return (c[n] - c[lo]) / np.minimum(n, window)[:, None] / 100
+
+    def rolling_average(self, rtype="Expense", window=3):
+        # {category: mean monthly total} over the `window` complete months before this one.
+        row = self.rolling(rtype, window)[self.current - 1 - self.first] if self.current > self.first else np.zeros(len(self.categories))
+        return {self.categories[i]: float(row[i]) for i in np.flatnonzero(row)}
+
+    def top_categories(self, n=5, rtype="Expense", months=12):
+        # Largest categories over the last `months` months (this one included), or all time if None.
+        totals = self.span(rtype, self.first if months is None else self.current - months + 1, self.current)
+        top = np.argsort(-totals, kind="stable")[:n]
+        return [(self.categories[i], float(totals[i] / 100)) for i in top if totals[i] > 0]
+
+    def burn_rate(self, budgets):
+        # Straight-line forecast of this month's spend per budget, matched to categories
+        # case-insensitively as on the dashboard: [(category, limit, spent, projected, day
+        # the limit is reached or None)].
+        if not budgets: return []
+        day, length = self.today.day, calendar.monthrange(self.today.year, self.today.month)[1]
+        spent_by_cat = self.span("Expense", self.current, self.current)
+        names = list(budgets)
+        lookup = {n.lower(): i for i, n in enumerate(names)}
+        owner = np.array([lookup.get(c.lower(), -1) for c in self.categories], dtype=np.int64)
+        hit = owner >= 0
+        spent = np.bincount(owner[hit], weights=spent_by_cat[hit], minlength=len(names)) / 100
+        limits = np.array([budgets[n] for n in names], dtype=np.float64)
+        rate = spent / day
+        projected = rate * length
+        with np.errstate(divide="ignore", invalid="ignore"):
+            reached = np.where(spent >= limits, day, np.ceil(limits / rate))
+        return [(names[i], float(limits[i]), float(spent[i]), float(projected[i]), int(reached[i]) if reached[i] <= length else None) for i in range(len(names))]
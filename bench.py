@@ -0,0 +1,329 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from exporter import export_records
+from ledger import RecordStore, Rollup, SearchIndex
+from schedule import bill_recurring
+from storage import JsonStore, SQLiteStore, atomic_write_json, atomic_write_snapshot
+
+CATEGORIES = ["Food", "Transport", "Rent", "Utilities", "Entertainment", "Travel", "Health", "Gaming"]
+WORDS = ["coffee", "lunch", "uber", "netflix", "grocery", "pharmacy", "steam", "hotel", "rent", "power", "water", "cinema"]
+
+
+def synthetic_records(n, seed=1, years=10, categories=CATEGORIES):
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=365 * years)
+    span = 365 * years
+    out = []
+    for _ in range(n):
+        d = (start + timedelta(days=rng.randrange(span))).isoformat()
+        if rng.random() < 0.1:
+            out.append({"type": "Income", "amount": round(rng.uniform(500, 5000), 2), "category": rng.choice(["Salary", "Freelance"]), "desc": "payout", "date": d})
+        else:
+            out.append({"type": "Expense", "amount": round(rng.uniform(1, 300), 2), "category": rng.choice(categories),
+                        "desc": f"{rng.choice(WORDS)} {rng.choice(WORDS)} #{rng.randrange(1000)}", "date": d})
+    out.sort(key=lambda r: r['date'])
+    return out
+
+
+def synthetic_ledger(n, categories=len(CATEGORIES), budgets=5, recurring=50, seed=1, years=10):
+    # A ledger plus matching settings: `budgets` of the categories get a monthly limit
+    # and `recurring` flows of mixed periods were last billed up to a year ago.
+    names = (CATEGORIES + [f"Category {i}" for i in range(len(CATEGORIES), categories)])[:categories]
+    rng = random.Random(seed)
+    today = date.today()
+    flows = [{"type": "Expense", "amount": round(rng.uniform(5, 200), 2), "category": rng.choice(names), "desc": f"flow {i}",
+              "period": rng.choice(["monthly", "weekly", "yearly"]), "last_billed": (today - timedelta(days=rng.randrange(365))).isoformat()}
+             for i in range(recurring)]
+    settings = {"currency": "$", "budgets": {c: float(rng.randrange(200, 2000)) for c in names[:budgets]},
+                "expense_categories": names, "recurring": flows}
+    return synthetic_records(n, seed, years, names), settings
+
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - t) * 1000
+
+
+def bench_backends(sizes):
+    month = date.today().strftime("%Y-%m")
+    print(f"{'records':>10} {'backend':>8} {'startup ms':>11} {'month ms':>9} {'type+cat ms':>12} {'keyword ms':>11}")
+    for n in sizes:
+        records = synthetic_records(n)
+        with tempfile.TemporaryDirectory() as tmp:
+            data_file = os.path.join(tmp, "data.json")
+            db_file = os.path.join(tmp, "finance.db")
+            atomic_write_json(data_file, {"seq": 0, "records": records}, separators=(",", ":"))
+            db = SQLiteStore(db_file)
+            with db.db:
+                db.db.executemany("INSERT INTO records (type, amount, category, desc, date) VALUES (?, ?, ?, ?, ?)",
+                                  ((r['type'], r['amount'], r['category'], r['desc'], r['date']) for r in records))
+            db.close()
+            del records
+            for name, store in (("json", JsonStore(data_file, os.path.join(tmp, "settings.json"))), ("sqlite", SQLiteStore(db_file))):
+                startup = timed(store.load_records)
+                month_ms = timed(store.month_totals, month)
+                filter_ms = timed(store.match, None, "Expense", "Food")
+                keyword_ms = timed(store.match, "netflix", "All", "All")
+                print(f"{n:>10,} {name:>8} {startup:>11.1f} {month_ms:>9.2f} {filter_ms:>12.2f} {keyword_ms:>11.2f}")
+                store.close()
+
+
+def linear_scan(records, query):
+    # The ledger's original keyword filter: substring match on desc only.
+    q = query.lower()
+    return [i for i in range(len(records) - 1, -1, -1) if q in records[i].get('desc', "").lower()]
+
+
+def bench_search(sizes, queries=("netflix", "cof", "uber lunch", "food 12", "hotel steam #4")):
+    for n in sizes:
+        records = synthetic_records(n)
+        t = time.perf_counter()
+        index = SearchIndex(enumerate(records))
+        build = (time.perf_counter() - t) * 1000
+        print(f"{n:,} records: index built in {build:.0f} ms, {len(index.vocab):,} tokens")
+        print(f"  {'query':<18} {'hits':>9} {'index ms':>9} {'scan ms':>9}")
+        for q in queries:
+            t = time.perf_counter()
+            hits = index.search(q)
+            idx_ms = (time.perf_counter() - t) * 1000
+            scan_ms = timed(linear_scan, records, q)
+            print(f"  {q!r:<18} {len(hits):>9,} {idx_ms:>9.2f} {scan_ms:>9.2f}")
+
+
+def traced(build):
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def bench_memory(sizes):
+    # The ledger as the app holds it: the columns plus the rollup and keyword index every
+    # store builds on load, against the plain list of dicts it replaced.
+    print(f"{'records':>10} {'dicts MB':>9} {'columns MB':>11} {'index MB':>9} {'store MB':>9} {'ratio':>6} {'sum dicts':>9} {'sum cols':>9} {'sum exp d':>10} {'sum exp c':>10}  (ms)")
+    for n in sizes:
+        # Round-trip through JSON text so the dicts hold separate string objects, as they do after load_data.
+        raw = json.dumps(synthetic_records(n))
+        dicts, dict_bytes = traced(lambda: json.loads(raw))
+        columns, col_bytes = traced(lambda: RecordStore(json.loads(raw)))
+        del raw
+        (rollup, index), index_bytes = traced(lambda: (Rollup(columns), SearchIndex.from_columns(range(1, n + 1), columns)))
+        store_bytes = col_bytes + index_bytes
+        total_ms = (timed(lambda: sum(r['amount'] for r in dicts)), timed(lambda: sum(columns.cents)))
+        tid = columns.type_index['Expense']
+        filtered_ms = (timed(lambda: sum(r['amount'] for r in dicts if r['type'] == 'Expense')),
+                       timed(lambda: sum(c for c, t in zip(columns.cents, columns.type_ids) if t == tid)))
+        print(f"{n:>10,} {dict_bytes / 2**20:>9.1f} {col_bytes / 2**20:>11.1f} {index_bytes / 2**20:>9.1f} {store_bytes / 2**20:>9.1f} {dict_bytes / store_bytes:>5.1f}x "
+              f"{total_ms[0]:>9.1f} {total_ms[1]:>9.1f} {filtered_ms[0]:>10.1f} {filtered_ms[1]:>10.1f}")
+
+
+def bench_persistence(sizes):
+    # N back-to-back edits, as when deleting rows or registering categories in quick
+    # succession: how long the caller (the Tk thread) is held, and how many physical
+    # writes the worker ends up doing.
+    print(f"{'edits':>8} {'backend':>8} {'caller ms':>10} {'flush ms':>9} {'writes':>7}")
+    for n in sizes:
+        records = synthetic_records(n)
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, store in (("json", JsonStore(os.path.join(tmp, "data.json"), os.path.join(tmp, "settings.json"))),
+                                ("sqlite", SQLiteStore(os.path.join(tmp, "finance.db")))):
+                store.load_records()
+                t = time.perf_counter()
+                for i, r in enumerate(records):
+                    store.add_records([r])
+                    if i % 10 == 0: store.save_settings({"currency": "$", "edits": i})
+                caller = (time.perf_counter() - t) * 1000
+                flush = timed(store.flush)
+                print(f"{n:>8,} {name:>8} {caller:>10.1f} {flush:>9.1f} {store.worker.writes:>7}")
+                store.close()
+
+
+def bench_reports(sizes):
+    from analytics import Reports
+    budgets = {c: 1000.0 for c in CATEGORIES}
+    print(f"{'records':>10} {'build ms':>9} {'mom ms':>7} {'yoy ms':>7} {'rolling ms':>11} {'top ms':>7} {'burn ms':>8} {'total ms':>9}")
+    for n in sizes:
+        records = RecordStore(synthetic_records(n))
+        t = time.perf_counter()
+        reports = Reports(records)
+        build = (time.perf_counter() - t) * 1000
+        steps = [timed(fn) for fn in (reports.month_over_month, reports.year_over_year, reports.rolling_average,
+                                      reports.top_categories, lambda: reports.burn_rate(budgets))]
+        total = (time.perf_counter() - t) * 1000
+        print(f"{n:>10,} {build:>9.1f} " + " ".join(f"{ms:>{w}.2f}" for ms, w in zip(steps, (7, 7, 11, 7, 8))) + f" {total:>9.1f}")
+
+
+APP_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+NOISE_MS = 1.0
+APP_VIEWS = ("show_dashboard", "show_chart", "show_history", "show_reports")
+
+
+def bench_views(tmp, n, results):
+    # Drives the real window. Tk needs a display (on a server: xvfb-run python bench.py app);
+    # without one the view paths are reported as skipped and the data paths still run.
+    import tkinter
+    from instrument import count_widgets
+    cwd = os.getcwd()
+    os.chdir(tmp)
+    try:
+        import main
+        try: app = main.ModernFinancePro()
+        except tkinter.TclError as e: return str(e)
+        app.withdraw()
+        app.loader.join()
+        app.on_loaded()
+        for name in APP_VIEWS:
+            if name == "show_chart": app.chart_key = None  # force a redraw rather than a no-op
+            t = time.perf_counter()
+            getattr(app, name)()
+            app.update_idletasks()
+            results.append({"records": n, "path": name, "ms": (time.perf_counter() - t) * 1000, "widgets": count_widgets(app.main_frame)})
+        app.on_close()
+    finally: os.chdir(cwd)
+
+
+LEDGER_PAGE_SIZE = 20  # main.LEDGER_PAGE_SIZE; main needs customtkinter just to import
+
+
+def bench_view_data(store, settings, n, results):
+    # What each view computes before it builds any widgets, timed without Tk so the
+    # numbers exist on a headless machine too. Imports and matplotlib's first-draw font
+    # loading happen once up front, outside the timers, as they do once per app session.
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from analytics import Reports
+    fig = Figure(figsize=(6, 4), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    records, budgets = store.records, settings["budgets"]
+
+    def dashboard():
+        totals = store.month_totals(date.today().strftime("%Y-%m"))
+        sum(v for (t, c), v in totals.items() if t == 'Income'), sum(v for (t, c), v in totals.items() if t == 'Expense')
+        for cat in budgets: sum(v for (t, c), v in totals.items() if t == 'Expense' and c.lower() == cat.lower())
+
+    def chart():
+        categories = store.category_totals('Expense')
+        fig.clear()
+        fig.add_subplot().pie(categories.values(), labels=categories.keys(), autopct='%1.1f%%', wedgeprops={'width': 0.4})
+        canvas.draw()
+
+    def page(rows):
+        for pos in range(min(LEDGER_PAGE_SIZE, len(rows))):
+            r = records[rows[pos]]
+            r['type'], r['date'], r['category'], r['amount']
+
+    def history():
+        # Opening the ledger, then a keyword search and a type + category filter, one page each.
+        page(range(len(records) - 1, -1, -1))
+        page(store.match("c"))
+        page(store.match(None, "Expense", settings["expense_categories"][0]))
+
+    def reports():
+        reports = Reports(records)
+        reports.month_over_month(), reports.year_over_year(), reports.rolling_average(), reports.top_categories(5), reports.burn_rate(budgets)
+
+    for name, fn in (("dashboard_data", dashboard), ("chart_data", chart), ("history_data", history), ("reports_data", reports)):
+        results.append({"records": n, "path": name, "ms": timed(fn)})
+
+
+def bench_app(sizes, backend="json", **ledger):
+    # The app's hot paths on a synthetic ledger of each size. load_data, save_data and
+    # process_recurring are timed through the store exactly as the app calls them (the
+    # last via schedule.bill_recurring, which the app's process_recurring wraps), and
+    # export_to_csv as its worker does (export_records over every ledger row). The views'
+    # data paths run headless too (bench_view_data); the views themselves need a display
+    # (see bench_views).
+    results, skipped = [], None
+    for n in sizes:
+        records, settings = synthetic_ledger(n, **ledger)
+        with tempfile.TemporaryDirectory() as tmp:
+            data_file, settings_file = os.path.join(tmp, "data.json"), os.path.join(tmp, "settings.json")
+            atomic_write_snapshot(data_file, 0, RecordStore(records))
+            atomic_write_json(settings_file, settings, indent=4)
+            del records
+            if backend == "sqlite":
+                from storage import migrate_to_sqlite
+                migrate_to_sqlite(data_file, settings_file, os.path.join(tmp, "finance.db"))
+                store = SQLiteStore(os.path.join(tmp, "finance.db"))
+            else: store = JsonStore(data_file, settings_file)
+            # No coalescing delay: flush() would otherwise sleep COALESCE_WINDOW before every
+            # write and the saving paths would mostly measure the sleep.
+            store.worker.window = 0
+            # process_recurring bills a fresh copy of the flows each run; the copy is made here,
+            # outside the timer, and the catch-up batch plus settings write is flushed inside it.
+            flows = copy.deepcopy(settings)
+            paths = [("load_data", store.load_records),
+                     ("process_recurring", lambda: (bill_recurring(store, flows), store.flush())),
+                     ("save_data", lambda: (store.compact(wait=True), store.flush())),
+                     ("export_to_csv", lambda: export_records(os.path.join(tmp, "export.csv"), store.records, range(len(store.records) - 1, -1, -1)))]
+            for name, fn in paths: results.append({"records": n, "path": name, "ms": timed(fn)})
+            bench_view_data(store, settings, n, results)
+            store.close()
+            if backend == "sqlite": os.remove(data_file)
+            if skipped is None: skipped = bench_views(tmp, n, results)
+        for r in results:
+            if r["records"] == n: print(f"{n:>10,} {r['path']:<18} {r['ms']:>10.1f} ms" + (f" {r['widgets']:>6} widgets" if "widgets" in r else ""))
+    if skipped: print(f"views skipped: {skipped}")
+    return results, skipped
+
+
+def write_results(path, suite, results, skipped, backend):
+    try: rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError: rev = None
+    meta = {"suite": suite, "backend": backend, "commit": rev, "python": platform.python_version(), "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "views_skipped": skipped}
+    atomic_write_json(path, {"meta": meta, "results": results}, indent=1)
+
+
+def compare_results(baseline, results, tolerance):
+    # Flags every path that got slower than baseline * tolerance; returns True if any did.
+    with open(baseline) as f: before = {(r["records"], r["path"]): r["ms"] for r in json.load(f)["results"]}
+    regressed = False
+    print(f"{'records':>10} {'path':<18} {'before ms':>10} {'after ms':>10} {'ratio':>6}")
+    for r in results:
+        old = before.get((r["records"], r["path"]))
+        if old is None: continue
+        ratio = r["ms"] / old if old else 1.0
+        # Sub-millisecond paths jitter by more than any tolerance; a slowdown must also cost real time.
+        flag = ratio > tolerance and r["ms"] - old > NOISE_MS
+        regressed |= flag
+        print(f"{r['records']:>10,} {r['path']:<18} {old:>10.1f} {r['ms']:>10.1f} {ratio:>5.2f}x" + ("  REGRESSION" if flag else ""))
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NEURAL FINANCE • PRO benchmarks")
+    parser.add_argument("suite", nargs="?", default="storage", choices=["storage", "search", "memory", "persist", "reports", "app"])
+    parser.add_argument("--sizes", type=int, nargs="+")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json", help="app suite: storage backend")
+    parser.add_argument("--categories", type=int, default=len(CATEGORIES), help="app suite: expense categories in the synthetic ledger")
+    parser.add_argument("--budgets", type=int, default=5, help="app suite: categories with a monthly budget")
+    parser.add_argument("--recurring", type=int, default=50, help="app suite: recurring flows")
+    parser.add_argument("--json", metavar="FILE", help="app suite: write machine-readable results to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="app suite: compare with an earlier --json FILE and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="slowdown ratio counted as a regression (default 1.25)")
+    args = parser.parse_args()
+    if args.suite == "app":
+        results, skipped = bench_app(args.sizes or APP_SIZES, args.backend, categories=args.categories, budgets=args.budgets, recurring=args.recurring)
+        if args.json: write_results(args.json, "app", results, skipped, args.backend)
+        if args.compare and compare_results(args.compare, results, args.tolerance): sys.exit(1)
+        sys.exit(0)
+    if args.suite == "search": bench_search(args.sizes or [500_000])
+    elif args.suite == "persist": bench_persistence(args.sizes or [10, 100, 1000])
+    elif args.suite == "reports": bench_reports(args.sizes or [100_000, 1_000_000])
+    elif args.suite == "memory": bench_memory(args.sizes or [100_000, 1_000_000])
+    else: bench_backends(args.sizes or [10_000, 100_000, 1_000_000])
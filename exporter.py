@@ -0,0 +1,60 @@
+import csv
+import gzip
+import os
+from itertools import islice
+from json.encoder import encode_basestring
+
+HEADER = ["Date", "Type", "Category", "Amount", "Description"]
+PROGRESS_EVERY = 10_000
+
+
+def format_for(path):
+    p = path.lower()
+    if p.endswith(".gz"): return "csv.gz"
+    if p.endswith((".jsonl", ".ndjson")): return "jsonl"
+    return "csv"
+
+
+def iter_rows(records, positions):
+    # positions are ledger rows (newest first); the file is written oldest first, like
+    # the original full export. Reads the columns directly, one row at a time.
+    cents, days, tids, cids, descs = records.cents, records.days, records.type_ids, records.cat_ids, records.descs
+    types, cats, iso = records.types, records.categories, records.iso
+    for i in reversed(positions):
+        yield iso(days[i]), types[tids[i]], cats[cids[i]], f"{cents[i] / 100:.2f}", descs[i]
+
+
+def export_records(path, records, positions, fmt=None, progress=None, cancel=None):
+    # Streams to a temp file and renames it into place once complete, so a cancelled or
+    # failed export never leaves a half-written file behind. Returns rows written, or
+    # None if cancelled.
+    fmt = fmt or format_for(path)
+    tmp = path + ".part"
+    written = 0
+    try:
+        if fmt == "csv.gz": f = gzip.open(tmp, 'wt', newline='', compresslevel=6)
+        else: f = open(tmp, 'w', newline='')
+        with f:
+            if fmt == "jsonl":
+                q = encode_basestring
+                write = lambda rows: f.write("".join(
+                    f'{{"date":"{d}","type":{q(t)},"category":{q(c)},"amount":{a},"desc":{q(s)}}}\n' for d, t, c, a, s in rows))
+            else:
+                writer = csv.writer(f)
+                writer.writerow(HEADER)
+                write = writer.writerows
+            rows = iter_rows(records, positions)
+            while True:
+                chunk = list(islice(rows, PROGRESS_EVERY))
+                if not chunk: break
+                write(chunk)
+                written += len(chunk)
+                if cancel is not None and cancel.is_set():
+                    f.close(); os.remove(tmp)
+                    return None
+                if progress: progress(written)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp): os.remove(tmp)
+        raise
+    return written
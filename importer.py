@@ -0,0 +1,205 @@
+import csv
+import re
+from collections import Counter
+from datetime import datetime
+
+from ledger import RecordStore
+
+# Header names seen on bank statements, lower-cased, mapped to ledger fields.
+COLUMN_ALIASES = {
+    "date": ("date", "transaction date", "posted date", "posting date", "booking date", "value date"),
+    "amount": ("amount", "value", "transaction amount", "sum"),
+    "debit": ("debit", "withdrawal", "withdrawals", "money out", "paid out"),
+    "credit": ("credit", "deposit", "deposits", "money in", "paid in"),
+    "type": ("type", "transaction type", "dr/cr", "debit/credit"),
+    "category": ("category",),
+    "desc": ("description", "desc", "memo", "payee", "details", "narrative", "name", "reference"),
+}
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d.%m.%Y", "%Y/%m/%d", "%d-%m-%Y", "%Y%m%d")
+EXPENSE_WORDS = {"expense", "debit", "dr", "withdrawal", "payment", "pos", "atm", "fee", "check", "xfer"}
+INCOME_WORDS = {"income", "credit", "cr", "deposit", "int", "div", "dep", "directdep"}
+FIELDS = tuple(COLUMN_ALIASES)
+READ_CHUNK = 1 << 16
+MAX_AMOUNT = 2 ** 63 / 100
+
+
+def parse_amount(text):
+    try: value = float(text)
+    except ValueError:
+        t = text.strip()
+        neg = (t.startswith("(") and t.endswith(")")) or "-" in t
+        s = re.sub(r"[^\d.,]", "", t)
+        if "," in s and "." in s:
+            s = s.replace(",", "") if s.rfind(".") > s.rfind(",") else s.replace(".", "").replace(",", ".")
+        elif "," in s:
+            s = s.replace(",", ".") if len(s) - s.rfind(",") in (2, 3) else s.replace(",", "")
+        value = -float(s) if neg else float(s)
+    # Also rejects inf and nan, which float() accepts; the ledger keeps int64 cents.
+    if not abs(value) < MAX_AMOUNT: raise ValueError(f"amount {text.strip()!r} out of range")
+    return int(round(value * 100))
+
+
+def date_text(text):
+    s = text.strip()
+    # OFX stamps look like 20261017120000[-5:EST]; ISO ones may carry a time part.
+    if len(s) > 10 and s[:8].isdigit(): return s[:8]
+    if len(s) > 10 and s[4:5] == "-": return s[:10]
+    return s
+
+
+def parse_date(text, formats=DATE_FORMATS):
+    s = date_text(text)
+    for fmt in formats:
+        try: return datetime.strptime(s, fmt).date()
+        except ValueError: continue
+    raise ValueError(f"unrecognised date {text!r}")
+
+
+def readable(text, fmt):
+    try: return datetime.strptime(text, fmt).date()
+    except ValueError: return None
+
+
+class AmbiguousDates(ValueError):
+    # Every date in the file reads under more than one format, with different results
+    # (a US statement whose days never pass the 12th). readings maps format -> date for
+    # one such example, so the caller can ask which one is meant.
+    def __init__(self, example, readings):
+        super().__init__(f"dates such as {example!r} could be read more than one way; choose a date format")
+        self.example, self.readings = example, readings
+
+
+class DateFormat:
+    # Settles on one date format for the whole file. Each new date text narrows the
+    # candidates to the formats that can read it (texts no candidate reads are left for
+    # the row to be rejected); rows are held back by the caller until one reading is left.
+    def __init__(self, formats):
+        self.formats = list(formats)
+        self._seen = set()
+
+    def feed(self, text):
+        s = date_text(text)
+        if len(self.formats) > 1 and s not in self._seen:
+            self._seen.add(s)
+            fits = [f for f in self.formats if readable(s, f)]
+            if fits: self.formats = fits
+        return self.settled()
+
+    def settled(self):
+        return len(self.formats) == 1
+
+    def resolve(self):
+        # At the end of the file: formats still in the running are fine if they read every
+        # date the same way, and ambiguous otherwise.
+        for s in self._seen:
+            readings = {f: readable(s, f) for f in self.formats}
+            if None not in readings.values() and len(set(readings.values())) > 1: raise AmbiguousDates(s, readings)
+        self.formats = self.formats[:1]
+
+
+def map_columns(header, columns=None):
+    names = [h.strip().lower() for h in header]
+    mapping = {field: names.index(name.strip().lower()) for field, name in (columns or {}).items() if name.strip().lower() in names}
+    for field, aliases in COLUMN_ALIASES.items():
+        if field in mapping: continue
+        for alias in aliases:
+            if alias in names: mapping[field] = names.index(alias); break
+    if "date" not in mapping or not ({"amount", "debit", "credit"} & set(mapping)):
+        raise ValueError("statement needs a date column and an amount (or debit/credit) column")
+    return mapping
+
+
+def iter_csv(path, columns=None):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try: dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error: dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        mapping = map_columns(next(reader), columns)
+        idx = [mapping.get(field, -1) for field in FIELDS]
+        for row in reader:
+            if not any(row): continue
+            n = len(row)
+            yield [row[i] if 0 <= i < n else "" for i in idx]
+
+
+def iter_ofx(path):
+    # OFX/QFX statements (SGML or XML): one <STMTTRN> block per transaction. Read in
+    # fixed-size chunks so a statement of any size is scanned with bounded memory.
+    tag = re.compile(r"<(\w+)>([^<\r\n]*)")
+    buf = ""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            buf += chunk
+            while True:
+                start = buf.find("<STMTTRN>")
+                end = buf.find("</STMTTRN>", start)
+                if start < 0 or end < 0: break
+                fields = {k.upper(): v.strip() for k, v in tag.findall(buf[start + 9:end])}
+                buf = buf[end + 10:]
+                desc = " ".join(filter(None, (fields.get("NAME", ""), fields.get("MEMO", ""))))
+                yield [fields.get("DTPOSTED", ""), fields.get("TRNAMT", ""), "", "", fields.get("TRNTYPE", ""), "", desc]
+            if not chunk: break
+            if "<STMTTRN>" not in buf: buf = buf[-9:]
+
+
+def normalize(fields, default_category, days, formats=DATE_FORMATS):
+    # fields follows FIELDS; days caches date text -> ordinal, as statements repeat dates heavily.
+    text, amount, debit, credit, kind, category, desc = fields
+    day = days.get(text)
+    if day is None: day = days[text] = parse_date(text, formats).toordinal()
+    if amount.strip(): cents = parse_amount(amount)
+    elif debit.strip(): cents = -abs(parse_amount(debit))
+    elif credit.strip(): cents = abs(parse_amount(credit))
+    else: raise ValueError("no amount")
+    kind = kind.strip().lower()
+    if kind in EXPENSE_WORDS: rtype = "Expense"
+    elif kind in INCOME_WORDS: rtype = "Income"
+    else: rtype = "Expense" if cents < 0 else "Income"
+    return rtype, abs(cents), category.strip() or default_category, " ".join(desc.split()), day
+
+
+def parse_statement(path, existing, default_category="Imported", columns=None, date_format=None, progress=None, every=50_000):
+    # existing is a RecordStore snapshot of the ledger. Duplicates are matched as a
+    # multiset on (date, amount, description): a statement line only counts as already
+    # imported while an unmatched ledger entry with the same key remains.
+    # Dates are read with one format for the whole file: date_format if given (a strptime
+    # pattern), otherwise the one DateFormat settles on. Raises AmbiguousDates if the
+    # file never tells day-first and month-first apart.
+    seen = Counter(map(hash, zip(existing.days, existing.cents, existing.descs)))
+    ofx = path.lower().endswith((".ofx", ".qfx"))
+    rows = iter_ofx(path) if ofx else iter_csv(path, columns)
+    dates = DateFormat([date_format] if date_format else ["%Y%m%d"] if ofx else DATE_FORMATS)
+    batch, days = RecordStore(), {}
+    add = batch.add_parsed
+    report = {"imported": 0, "duplicates": 0, "rejected": 0, "errors": []}
+    held = []
+
+    def take(n, fields):
+        try: rtype, cents, category, desc, day = normalize(fields, default_category, days, dates.formats)
+        except (ValueError, KeyError, ArithmeticError) as e:
+            report["rejected"] += 1
+            if len(report["errors"]) < 5: report["errors"].append(f"row {n}: {e}")
+            return
+        key = hash((day, cents, desc))
+        if seen[key] > 0:
+            seen[key] -= 1
+            report["duplicates"] += 1
+            return
+        add(rtype, cents, category, desc, day)
+        report["imported"] += 1
+
+    for n, fields in enumerate(rows, 1):
+        if held is not None:
+            if not dates.feed(fields[0]):
+                held.append((n, fields)); continue
+            for row in held: take(*row)
+            held = None
+        take(n, fields)
+        if progress and n % every == 0: progress(n)
+    if held:
+        dates.resolve()
+        for row in held: take(*row)
+    return batch, report
@@ -0,0 +1,73 @@
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+
+VIEWS = ("show_dashboard", "show_chart", "show_add_form", "show_history", "filter_ledger", "show_reports",
+         "show_budgets", "show_recurring_manager", "show_settings")
+
+
+def count_widgets(widget):
+    return sum(1 + count_widgets(w) for w in widget.winfo_children())
+
+
+class Instrumentation:
+    # Opt-in diagnostics (main.py --instrument): one JSON line per view render and per
+    # persistence write, so slow navigation in the field can be traced to the view, the
+    # number of widgets it built, or the disk, plus a rollup consistency check on exit.
+    # Appends, so runs accumulate in one file.
+    def __init__(self, path="instrument.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', buffering=1)
+
+    def record(self, event, **fields):
+        line = json.dumps({"t": round(time.time(), 3), "event": event, **fields})
+        with self._lock:
+            if self._file is not None: self._file.write(line + "\n")
+
+    def wrap_views(self, app, names=VIEWS):
+        # Replaces each view method on the instance, so nav buttons and internal calls alike
+        # are timed. Render time includes the pending layout work (update_idletasks).
+        for name in names:
+            fn = getattr(app, name)
+
+            def view(*args, _fn=fn, _name=name, **kw):
+                t = time.perf_counter()
+                result = _fn(*args, **kw)
+                app.update_idletasks()
+                self.record("view", view=_name, ms=round((time.perf_counter() - t) * 1000, 2),
+                            widgets=count_widgets(app.main_frame), records=len(app.records))
+                return result
+            setattr(app, name, view)
+
+    def save(self, key, waited, took):
+        # PersistenceWorker trace hook; runs on the worker thread.
+        self.record("save", key=key if isinstance(key, str) else key[0], wait_ms=round(waited * 1000, 2), write_ms=round(took * 1000, 2))
+
+    def close(self):
+        with self._lock:
+            if self._file is not None: self._file.close(); self._file = None
+
+
+def summarize(path):
+    views, saves = defaultdict(list), defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            try: e = json.loads(line)
+            except ValueError: continue
+            if e.get("event") == "view": views[e["view"]].append((e["ms"], e["widgets"]))
+            elif e.get("event") == "save": saves[e["key"]].append((e["wait_ms"] + e["write_ms"], e["write_ms"]))
+            elif e.get("event") == "rollup" and e["mismatches"]: print(f"ROLLUP INCONSISTENT at {time.ctime(e['t'])}: {', '.join(e['cells'])}")
+    for title, samples, extra, digits in (("view", views, "max widgets", 0), ("save", saves, "max write ms", 1)):
+        if not samples: continue
+        print(f"{title:<24} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {extra:>13}")
+        for name, rows in sorted(samples.items()):
+            ms = sorted(r[0] for r in rows)
+            print(f"{name:<24} {len(ms):>6} {ms[len(ms) // 2]:>8.1f} {ms[int(len(ms) * 0.95)]:>8.1f} {ms[-1]:>8.1f} {max(r[1] for r in rows):>13,.{digits}f}")
+        print()
+
+
+if __name__ == "__main__":
+    summarize(sys.argv[1] if len(sys.argv) > 1 else "instrument.jsonl")
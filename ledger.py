@@ -0,0 +1,309 @@
+import bisect
+import re
+from array import array
+from datetime import date
+from itertools import chain
+
+FIELDS = ("type", "amount", "category", "desc", "date")
+
+
+def to_cents(amount):
+    return int(round(float(amount) * 100))
+
+
+def amount_token(cents):
+    return f"{cents / 100:.2f}"
+
+
+class RecordView:
+    # Dict-like window onto one row of a RecordStore. Views are positional, so they are
+    # meant to be read straight away, not kept across deletes.
+    __slots__ = ("_store", "_i")
+
+    def __init__(self, store, i):
+        self._store, self._i = store, i
+
+    def __getitem__(self, key): return self._store.field(self._i, key)
+
+    def get(self, key, default=None):
+        return self._store.field(self._i, key) if key in FIELDS else default
+
+    def keys(self): return FIELDS
+
+    def __iter__(self): return iter(FIELDS)
+
+    def __repr__(self): return repr(dict(self))
+
+
+class RecordStore:
+    # Column-per-field storage for the ledger: amounts as int64 cents, dates as day
+    # ordinals, type and category as indexes into small interned name tables, and
+    # repeated descriptions sharing one string. Indexing
+    # returns a RecordView so code written against the old list of dicts keeps working.
+    def __init__(self, records=()):
+        self.cents = array('q')
+        self.days = array('i')
+        self.type_ids = array('B')
+        self.cat_ids = array('I')
+        self.descs = []
+        self.types, self.type_index = [], {}
+        self.categories, self.category_index = [], {}
+        self._iso, self._ordinal, self._desc_pool = {}, {}, {}
+        self.extend(records)
+
+    def _intern(self, names, index, name):
+        i = index.get(name)
+        if i is None:
+            i = index[name] = len(names)
+            names.append(name)
+        return i
+
+    def add_row(self, rtype, amount, category, desc, day):
+        d = self._ordinal.get(day)
+        if d is None: d = self._ordinal[day] = date.fromisoformat(day).toordinal()
+        self.add_parsed(rtype, int(round(float(amount) * 100)), category, desc or "", d)
+
+    def add_parsed(self, rtype, cents, category, desc, day):
+        self.cents.append(cents)
+        self.days.append(day)
+        t = self.type_index.get(rtype)
+        self.type_ids.append(t if t is not None else self._intern(self.types, self.type_index, rtype))
+        c = self.category_index.get(category)
+        self.cat_ids.append(c if c is not None else self._intern(self.categories, self.category_index, category))
+        self.descs.append(self._desc_pool.setdefault(desc, desc))
+
+    def append(self, r):
+        self.add_row(r['type'], r['amount'], r['category'], r.get('desc', ""), r['date'])
+
+    def extend(self, records):
+        add = self.add_row
+        for r in records: add(r['type'], r['amount'], r['category'], r.get('desc', ""), r['date'])
+
+    def extend_columns(self, other):
+        # Appends another RecordStore wholesale, remapping its type and category ids.
+        tmap = array('B', (self._intern(self.types, self.type_index, t) for t in other.types))
+        cmap = array('I', (self._intern(self.categories, self.category_index, c) for c in other.categories))
+        self.cents.extend(other.cents)
+        self.days.extend(other.days)
+        self.type_ids.extend(array('B', (tmap[t] for t in other.type_ids)))
+        self.cat_ids.extend(array('I', (cmap[c] for c in other.cat_ids)))
+        pool = self._desc_pool
+        self.descs.extend(pool.setdefault(d, d) for d in other.descs)
+
+    def iso(self, day):
+        s = self._iso.get(day)
+        if s is None: s = self._iso[day] = date.fromordinal(day).isoformat()
+        return s
+
+    def field(self, i, key):
+        if key == 'amount': return self.cents[i] / 100
+        if key == 'date': return self.iso(self.days[i])
+        if key == 'category': return self.categories[self.cat_ids[i]]
+        if key == 'type': return self.types[self.type_ids[i]]
+        if key == 'desc': return self.descs[i]
+        raise KeyError(key)
+
+    def as_dict(self, i):
+        return {"type": self.types[self.type_ids[i]], "amount": self.cents[i] / 100, "category": self.categories[self.cat_ids[i]],
+                "desc": self.descs[i], "date": self.iso(self.days[i])}
+
+    def iter_dicts(self):
+        return map(self.as_dict, range(len(self.descs)))
+
+    def __len__(self): return len(self.descs)
+
+    def __getitem__(self, i):
+        if i < 0: i += len(self.descs)
+        if not 0 <= i < len(self.descs): raise IndexError(i)
+        return RecordView(self, i)
+
+    def __iter__(self):
+        return (RecordView(self, i) for i in range(len(self.descs)))
+
+    def pop(self, i=-1):
+        r = self.as_dict(i)
+        for col in (self.cents, self.days, self.type_ids, self.cat_ids, self.descs): col.pop(i)
+        return r
+
+    def copy(self):
+        dup = RecordStore()
+        dup.cents, dup.days, dup.type_ids, dup.cat_ids = array('q', self.cents), array('i', self.days), array('B', self.type_ids), array('I', self.cat_ids)
+        dup.descs = list(self.descs)
+        dup._desc_pool = self._desc_pool
+        dup.types, dup.categories = list(self.types), list(self.categories)
+        dup.type_index, dup.category_index = dict(self.type_index), dict(self.category_index)
+        return dup
+
+    def filter_positions(self, rows, rtype="All", category="All"):
+        tid = self.type_index.get(rtype, -1) if rtype != "All" else None
+        cid = self.category_index.get(category, -1) if category != "All" else None
+        tids, cids = self.type_ids, self.cat_ids
+        if cid is None: return [i for i in rows if tids[i] == tid]
+        if tid is None: return [i for i in rows if cids[i] == cid]
+        return [i for i in rows if tids[i] == tid and cids[i] == cid]
+
+
+class Rollup:
+    # {"YYYY-MM": {(type, category): [cents, count]}}, plus the same cells summed over
+    # all months under "ALL". Kept in integer cents so adding and removing the same
+    # records always returns to exactly zero.
+    def __init__(self, records=()):
+        self.months = {}
+        if isinstance(records, RecordStore): self._build_columns(records)
+        else:
+            for r in records: self.add(r)
+
+    def _build_columns(self, rs):
+        cells, month_of = {}, {}
+        for day, t, c, cents in zip(rs.days, rs.type_ids, rs.cat_ids, rs.cents):
+            m = month_of.get(day)
+            if m is None: m = month_of[day] = rs.iso(day)[:7]
+            for key in ((m, t, c), ("ALL", t, c)):
+                cell = cells.get(key)
+                if cell is None: cells[key] = [cents, 1]
+                else: cell[0] += cents; cell[1] += 1
+        for (m, t, c), cell in cells.items():
+            self.months.setdefault(m, {})[(rs.types[t], rs.categories[c])] = cell
+
+    def add(self, r):
+        key, cents = (r['type'], r['category']), to_cents(r['amount'])
+        for month in (r['date'][:7], "ALL"):
+            cell = self.months.setdefault(month, {}).setdefault(key, [0, 0])
+            cell[0] += cents
+            cell[1] += 1
+
+    def remove(self, r):
+        key, cents = (r['type'], r['category']), to_cents(r['amount'])
+        for name in (r['date'][:7], "ALL"):
+            month = self.months.get(name)
+            if not month or key not in month: continue
+            cell = month[key]
+            cell[0] -= cents
+            cell[1] -= 1
+            if cell[1] <= 0:
+                del month[key]
+                if not month: del self.months[name]
+
+    def merge(self, other):
+        for month, cells in other.months.items():
+            mine = self.months.setdefault(month, {})
+            for key, (cents, count) in cells.items():
+                cell = mine.setdefault(key, [0, 0])
+                cell[0] += cents
+                cell[1] += count
+
+    def month_totals(self, month):
+        return {key: cents / 100 for key, (cents, _) in self.months.get(month, {}).items()}
+
+    def category_totals(self, rtype):
+        return {c: cents / 100 for (t, c), (cents, _) in self.months.get("ALL", {}).items() if t == rtype}
+
+    def diff(self, records):
+        return self.compare(Rollup(records).months)
+
+    def compare(self, fresh):
+        # [(month, key, ours, theirs)] for every cell that differs from another months table.
+        keys = {(m, k) for m in set(fresh) | set(self.months) for k in set(fresh.get(m, {})) | set(self.months.get(m, {}))}
+        return sorted((m, k, self.months.get(m, {}).get(k), fresh.get(m, {}).get(k)) for m, k in keys
+                      if self.months.get(m, {}).get(k) != fresh.get(m, {}).get(k))
+
+
+TOKEN_RE = re.compile(r"\d+(?:\.\d+)?|\w+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    # Inverted index from token to the uids of the records containing it, each posting a
+    # sorted array('q'): 8 bytes a uid rather than a set slot plus an int object, which
+    # kept the index bigger than the columns it indexes. uids are handed out in rising
+    # order, so building and adding append and only a delete moves memory. The
+    # vocabulary is kept sorted so a prefix maps to one contiguous bisect range.
+    def __init__(self, items=()):
+        self._fill((uid, f"{r.get('desc', '')} {r['category']}", to_cents(r['amount'])) for uid, r in items)
+
+    @classmethod
+    def from_columns(cls, uids, rs):
+        cats = rs.categories
+        index = cls.__new__(cls)
+        index._fill((uid, f"{d} {cats[c]}", cents) for uid, d, c, cents in zip(uids, rs.descs, rs.cat_ids, rs.cents))
+        return index
+
+    def _fill(self, rows):
+        postings = self.postings = {}
+        find = TOKEN_RE.findall
+        last = None
+        ordered = True
+        for uid, text, cents in rows:
+            if last is not None and uid <= last: ordered = False
+            last = uid
+            toks = find(text.lower())
+            toks.append(amount_token(cents))
+            for tok in toks:
+                uids = postings.get(tok)
+                if uids is None: postings[tok] = array('q', (uid,))
+                elif uids[-1] != uid: uids.append(uid)
+        if not ordered:
+            for tok, uids in postings.items(): postings[tok] = array('q', sorted(set(uids)))
+        self.vocab = sorted(postings)
+
+    def merge(self, other):
+        new = []
+        for tok, uids in other.postings.items():
+            mine = self.postings.get(tok)
+            if mine is None: self.postings[tok] = uids; new.append(tok)
+            elif mine[-1] < uids[0]: mine.extend(uids)
+            else: self.postings[tok] = array('q', sorted(set(mine).union(uids)))
+        if len(new) > 64: self.vocab = sorted(self.vocab + new)
+        else:
+            for tok in new: bisect.insort(self.vocab, tok)
+
+    def record_tokens(self, r):
+        toks = set(tokenize(f"{r.get('desc', '')} {r['category']}"))
+        toks.add(amount_token(to_cents(r['amount'])))
+        return toks
+
+    def add(self, uid, r):
+        for tok in self.record_tokens(r):
+            uids = self.postings.get(tok)
+            if uids is None:
+                uids = self.postings[tok] = array('q')
+                bisect.insort(self.vocab, tok)
+            if not uids or uids[-1] < uid: uids.append(uid)
+            else:
+                i = bisect.bisect_left(uids, uid)
+                if i == len(uids) or uids[i] != uid: uids.insert(i, uid)
+
+    def remove(self, uid, r):
+        for tok in self.record_tokens(r):
+            uids = self.postings.get(tok)
+            if uids is None: continue
+            i = bisect.bisect_left(uids, uid)
+            if i < len(uids) and uids[i] == uid: del uids[i]
+            if not uids:
+                del self.postings[tok]
+                i = bisect.bisect_left(self.vocab, tok)
+                if i < len(self.vocab) and self.vocab[i] == tok: del self.vocab[i]
+
+    def postings_for(self, term):
+        lo = bisect.bisect_left(self.vocab, term)
+        hi = bisect.bisect_left(self.vocab, term + "\uffff", lo)
+        return [self.postings[tok] for tok in self.vocab[lo:hi]]
+
+    def prefix(self, term):
+        return set(chain.from_iterable(self.postings_for(term)))
+
+    def search(self, query):
+        terms = sorted(set(tokenize(query)), key=len, reverse=True)
+        if not terms: return None
+        # Longest terms first: they have the narrowest prefix ranges, so the running
+        # intersection shrinks fastest. Later terms stream their postings through it
+        # rather than building a set of their own.
+        result = None
+        for term in terms:
+            if result is None: result = self.prefix(term)
+            else: result = result.intersection(chain.from_iterable(self.postings_for(term)))
+            if not result: break
+        return result
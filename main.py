@@ -1,12 +1,19 @@
+import time
+STARTUP_T0 = time.perf_counter()
 import customtkinter as ctk
-import json
-import os
-import csv
+import argparse
+import sqlite3
+import sys
+import threading
 from datetime import datetime
 from tkinter import messagebox, filedialog
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from tkcalendar import DateEntry
+from exporter import export_records
+from importer import AmbiguousDates, parse_statement
+from instrument import Instrumentation
+from ledger import Rollup
+from schedule import PERIODS, bill_recurring
+from storage import SQLiteStore, open_store, migrate_to_sqlite
+STARTUP_IMPORTED = time.perf_counter()
 
 
 ctk.set_appearance_mode("Dark")
@@ -15,9 +22,14 @@ BG_COLOR = "#0F172A"
 CARD_COLOR = "#1E293B"    
 SUCCESS_COLOR = "#10B981" 
 ERROR_COLOR = "#F43F5E"   
+LEDGER_PAGE_SIZE = 20
+SEARCH_DEBOUNCE_MS = 250
 
 class ModernFinancePro(ctk.CTk):
-    def __init__(self):
+    def __init__(self, startup_profile=False, instrument=None):
+        self.startup_profile = startup_profile
+        self.timings = {"import": STARTUP_IMPORTED - STARTUP_T0}
+        t_window = time.perf_counter()
         super().__init__()
 
         
@@ -26,10 +38,20 @@ class ModernFinancePro(ctk.CTk):
         self.configure(fg_color=BG_COLOR)    
         self.data_file = "data.json"
         self.settings_file = "settings.json"   
-        self.records = self.load_data()
-        self.settings = self.load_settings()
-        self.currency = self.settings.get("currency", "$")
-        self.process_recurring()
+        self.db_file = "finance.db"
+        self.store = open_store(self.data_file, self.settings_file, self.db_file)
+        self.records = []
+        self.settings = None
+        self.currency = "$"
+        self.nav_buttons = []
+        self.search_job = None
+        self.import_job = None
+        self.export_job = None
+        self.instrument = None
+        if instrument:
+            self.instrument = Instrumentation(instrument)
+            self.instrument.wrap_views(self)
+            self.store.worker.trace = self.instrument.save
         self.grid_columnconfigure(1, weight=1)
         self.grid_rowconfigure(0, weight=1)
         self.sidebar = ctk.CTkFrame(self, width=240, fg_color="#020617", corner_radius=0)
@@ -41,6 +63,7 @@ class ModernFinancePro(ctk.CTk):
         self.create_nav_btn("Dashboard", self.show_dashboard)
         self.create_nav_btn("Add Transaction", self.show_add_form)
         self.create_nav_btn("History", self.show_history)
+        self.create_nav_btn("Reports", self.show_reports)
         self.create_nav_btn("Subscriptions", self.show_recurring_manager)
         self.create_nav_btn("Monthly Budgets", self.show_budgets)
         self.create_nav_btn("Settings", self.show_settings)
@@ -49,7 +72,83 @@ class ModernFinancePro(ctk.CTk):
         self.main_frame = ctk.CTkScrollableFrame(self, fg_color="transparent", corner_radius=15)
         self.main_frame.grid(row=0, column=1, padx=30, pady=30, sticky="nsew")
         
+        self.chart_fig = None
+        self.chart_canvas = None
+        self.chart_key = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # The shell is shown right away; records are read on a worker thread and the
+        # first view is rendered once on_loaded() picks the result up on the Tk thread.
+        for btn in self.nav_buttons: btn.configure(state="disabled")
+        ctk.CTkLabel(self.main_frame, text="DECRYPTING LEDGER...", font=("Inter", 24, "bold"), text_color=ACCENT_COLOR).pack(pady=200)
+        self.timings["window"] = time.perf_counter() - t_window
+        self.load_error = None
+        self.recurring_error = None
+        self.loader = threading.Thread(target=self.load_in_background, daemon=True)
+        self.loader.start()
+        self.after(15, self.poll_loader)
+
+    def load_in_background(self):
+        t = time.perf_counter()
+        try:
+            self.records = self.load_data()
+            self.settings = self.load_settings()
+            self.currency = self.settings.get("currency", "$")
+        except Exception as e:
+            self.load_error = e
+            self.records = self.store.records
+        else:
+            try: self.process_recurring()
+            except Exception as e: self.recurring_error = e
+        self.timings["load"] = time.perf_counter() - t
+
+    def poll_loader(self):
+        if self.loader.is_alive(): self.after(15, self.poll_loader); return
+        self.on_loaded()
+
+    def on_loaded(self):
+        if self.load_error is not None:
+            read_only = "\n\nNothing will be saved this session, so your files are left untouched until the problem is fixed." if self.store.load_error is not None else ""
+            messagebox.showerror("SYSTEM ERROR", f"Could not load ledger: {self.load_error}{read_only}")
+            if self.settings is None: self.settings = self.load_settings()
+        if self.recurring_error is not None:
+            messagebox.showerror("SUBSCRIPTIONS", f"Recurring payments could not be billed: {self.recurring_error}\n\nNo subscription was billed or moved forward. Remove the broken entry under Subscriptions and add it again.")
+        for btn in self.nav_buttons: btn.configure(state="normal")
+        self.after(1000, self.poll_store)
+        t = time.perf_counter()
         self.show_dashboard()
+        self.update_idletasks()
+        self.timings["first render"] = time.perf_counter() - t
+        if self.startup_profile:
+            self.timings["total"] = time.perf_counter() - STARTUP_T0
+            print(f"STARTUP PROFILE ({len(self.records):,} records)")
+            for phase, secs in self.timings.items(): print(f"  {phase:<14}{secs * 1000:>10.1f} ms")
+            self.after(0, self.on_close)
+
+    def on_close(self):
+        if self.loader.is_alive(): self.loader.join()
+        if self.export_job is not None and self.export_job.is_alive(): self.export_cancel.set(); self.export_job.join()
+        self.close_chart()
+        if self.instrument:
+            # The rollup is only ever updated incrementally while the app runs; in diagnostics
+            # mode it is checked against a fresh build before exit.
+            t = time.perf_counter()
+            mismatches = self.store.verify_rollup()
+            self.instrument.record("rollup", mismatches=len(mismatches), cells=[f"{m} {k}" for m, k, _, _ in mismatches[:20]],
+                                   ms=round((time.perf_counter() - t) * 1000, 2), records=len(self.records))
+        try: self.store.close()
+        except Exception as e: messagebox.showerror("SAVE FAILED", f"Some changes could not be written to disk and are lost: {e}")
+        if self.instrument: self.instrument.close()
+        self.destroy()
+
+    def poll_store(self):
+        # Writes happen on the persistence worker after the UI has already confirmed the
+        # edit, so its failures are picked up here. Failed writes stay queued in memory.
+        try: self.store.worker.check()
+        except Exception as e:
+            if messagebox.askretrycancel("SAVE FAILED", f"Recent changes could not be written to disk: {e}\n\nThey are kept in memory and will be retried with your next change or on exit. Retry now?"):
+                self.store.retry()
+        self.after(1000, self.poll_store)
 
     def create_nav_btn(self, text, command):
        
@@ -58,51 +157,46 @@ class ModernFinancePro(ctk.CTk):
                             text_color="white", hover_color=CARD_COLOR,
                             anchor="w", font=("Segoe UI", 14, "bold")) 
         btn.pack(pady=5, padx=20, fill="x")
+        self.nav_buttons.append(btn)
 
    
     def load_data(self):
-        if not os.path.exists(self.data_file): return []
-        with open(self.data_file, 'r') as f:
-            try: return json.load(f)
-            except: return []
+        # Failures propagate to load_in_background, which reports them; the store is then
+        # left empty and read-only rather than half loaded.
+        return self.store.load_records()
 
     def load_settings(self):
         default = {"currency": "$", "budgets": {}, "expense_categories": ["Food", "Transport", "Rent", "Utilities", "Entertainment"], "recurring": []}
-        if not os.path.exists(self.settings_file): return default
-        with open(self.settings_file, 'r') as f:
-            try:
-                data = json.load(f)
-                for key in default:
-                    if key not in data: data[key] = default[key]
-                return data
-            except: return default
+        try: data = self.store.load_settings()
+        except (OSError, sqlite3.Error): data = None
+        if not isinstance(data, dict): return default
+        for key in default:
+            if key not in data: data[key] = default[key]
+        return data
 
     def save_settings(self):
-        with open(self.settings_file, 'w') as f: json.dump(self.settings, f, indent=4)
+        self.store.save_settings(self.settings)
 
     def save_data(self):
-        with open(self.data_file, 'w') as f: json.dump(self.records, f, indent=4)
-
-    def process_recurring(self):
-        today = datetime.now()
-        updated = False
-        for item in self.settings.get("recurring", []):
-            last_date = datetime.strptime(item['last_billed'], "%Y-%m-%d")
-            if (today.year > last_date.year) or (today.month > last_date.month):
-                self.records.append({"type": item['type'], "amount": item['amount'], "category": item['category'], "desc": f"AUTOPAY: {item['desc']}", "date": today.strftime("%Y-%m-%d")})
-                item['last_billed'] = today.strftime("%Y-%m-%d")
-                updated = True
-        if updated: self.save_data(); self.save_settings()
+        self.store.compact(wait=True)
+
+    def process_recurring(self, today=None):
+        bill_recurring(self.store, self.settings, today)
 
     
     def clear_frame(self):
-        for widget in self.main_frame.winfo_children(): widget.destroy()
+        if self.search_job is not None: self.after_cancel(self.search_job); self.search_job = None
+        chart = self.chart_canvas.get_tk_widget() if self.chart_canvas else None
+        for widget in self.main_frame.winfo_children():
+            if widget is chart: widget.pack_forget()
+            else: widget.destroy()
 
     def show_dashboard(self):
         self.clear_frame()
         cur_month = datetime.now().strftime("%Y-%m")
-        inc = sum(r['amount'] for r in self.records if r['type'] == 'Income' and r['date'].startswith(cur_month))
-        exp = sum(r['amount'] for r in self.records if r['type'] == 'Expense' and r['date'].startswith(cur_month))
+        totals = self.store.month_totals(cur_month)
+        inc = sum(v for (t, c), v in totals.items() if t == 'Income')
+        exp = sum(v for (t, c), v in totals.items() if t == 'Expense')
         
         
         ctk.CTkLabel(self.main_frame, text=f"DASHBOARD OVERVIEW", font=("Inter", 12, "bold"), text_color=ACCENT_COLOR).pack(anchor="w", padx=20)
@@ -120,7 +214,7 @@ class ModernFinancePro(ctk.CTk):
         if self.settings["budgets"]:
             ctk.CTkLabel(self.main_frame, text="BUDGET THRESHOLDS", font=("Inter", 12, "bold"), text_color=ACCENT_COLOR).pack(anchor="w", padx=20, pady=(40, 10))
             for cat, limit in self.settings["budgets"].items():
-                spent = sum(r['amount'] for r in self.records if r['category'].lower() == cat.lower() and r['type'] == 'Expense' and r['date'].startswith(cur_month))
+                spent = sum(v for (t, c), v in totals.items() if t == 'Expense' and c.lower() == cat.lower())
                 progress = spent / limit if limit > 0 else 0
                 p_color = SUCCESS_COLOR if progress < 0.8 else ("#F59E0B" if progress < 1.0 else ERROR_COLOR)
                 
@@ -141,21 +235,31 @@ class ModernFinancePro(ctk.CTk):
         return card
 
     def show_chart(self):
-        categories = {}
-        for r in self.records:
-            if r['type'] == 'Expense':
-                cat = r['category']
-                categories[cat] = categories.get(cat, 0) + r['amount']
-        
-        fig, ax = plt.subplots(figsize=(6, 4), dpi=100)
-        fig.patch.set_facecolor(BG_COLOR)
-        colors = ['#38BDF8', '#818CF8', '#C084FC', '#E879F9', '#FB7185']
-        ax.pie(categories.values(), labels=categories.keys(), autopct='%1.1f%%', textprops={'color':"w", 'weight':'bold'}, colors=colors, wedgeprops={'width': 0.4})
-        ax.set_title("EXPENSE ALLOCATION", color=ACCENT_COLOR, fontdict={'weight':'bold', 'size':12})
-        
-        canvas = FigureCanvasTkAgg(fig, master=self.main_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(pady=30)
+        categories = self.store.category_totals('Expense')
+        key = tuple(sorted(categories.items()))
+
+        # One figure and canvas live for the whole session; clear_frame() only unpacks
+        # the canvas, and it is redrawn only when the category totals actually change.
+        if self.chart_fig is None:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.chart_fig = Figure(figsize=(6, 4), dpi=100)
+            self.chart_fig.patch.set_facecolor(BG_COLOR)
+            self.chart_canvas = FigureCanvasTkAgg(self.chart_fig, master=self.main_frame)
+        if key != self.chart_key:
+            self.chart_fig.clear()
+            ax = self.chart_fig.add_subplot()
+            colors = ['#38BDF8', '#818CF8', '#C084FC', '#E879F9', '#FB7185']
+            ax.pie(categories.values(), labels=categories.keys(), autopct='%1.1f%%', textprops={'color':"w", 'weight':'bold'}, colors=colors, wedgeprops={'width': 0.4})
+            ax.set_title("EXPENSE ALLOCATION", color=ACCENT_COLOR, fontdict={'weight':'bold', 'size':12})
+            self.chart_canvas.draw()
+            self.chart_key = key
+        self.chart_canvas.get_tk_widget().pack(pady=30)
+
+    def close_chart(self):
+        if self.chart_canvas is not None: self.chart_canvas.get_tk_widget().destroy()
+        if self.chart_fig is not None: self.chart_fig.clear()
+        self.chart_fig = self.chart_canvas = self.chart_key = None
 
     def show_add_form(self):
         self.clear_frame()
@@ -175,6 +279,7 @@ class ModernFinancePro(ctk.CTk):
         date_frame = ctk.CTkFrame(panel, fg_color="transparent")
         date_frame.pack()
         
+        from tkcalendar import DateEntry
         self.ent_date = DateEntry(date_frame, width=15, background=ACCENT_COLOR, date_pattern='yyyy-mm-dd')
         self.ent_date.pack(side="left", padx=10, pady=10)
         
@@ -203,9 +308,9 @@ class ModernFinancePro(ctk.CTk):
     def save_record(self):
         try:
             amt = float(self.ent_amt.get())
-            self.records.append({"type": self.type_var.get(), "amount": amt, "category": self.cat_input.get(), 
-                                 "desc": self.ent_desc.get(), "date": self.ent_date.get_date().strftime("%Y-%m-%d")})
-            self.save_data(); messagebox.showinfo("SYSTEM", "Transaction Authenticated."); self.show_dashboard()
+            self.store.add_records([{"type": self.type_var.get(), "amount": amt, "category": self.cat_input.get(), 
+                                     "desc": self.ent_desc.get(), "date": self.ent_date.get_date().strftime("%Y-%m-%d")}])
+            messagebox.showinfo("SYSTEM", "Transaction Authenticated."); self.show_dashboard()
         except: messagebox.showerror("SYSTEM ERROR", "Invalid Monetary Value.")
 
     def show_history(self, filter_query=None, filter_type="All", filter_cat="All"):
@@ -218,49 +323,271 @@ class ModernFinancePro(ctk.CTk):
         
         self.search_ent = ctk.CTkEntry(f_bar, placeholder_text="Keyword Search...", width=200, fg_color=BG_COLOR)
         self.search_ent.grid(row=0, column=0, padx=10, pady=15)
+        if filter_query: self.search_ent.insert(0, filter_query)
+        self.search_ent.bind("<KeyRelease>", self.on_search_key)
         
-        self.type_filter = ctk.CTkOptionMenu(f_bar, values=["All", "Income", "Expense"], width=100, fg_color=BG_COLOR)
+        self.type_filter = ctk.CTkOptionMenu(f_bar, values=["All", "Income", "Expense"], width=100, fg_color=BG_COLOR, command=lambda _: self.apply_history_filters())
         self.type_filter.grid(row=0, column=1, padx=5)
+        self.type_filter.set(filter_type)
         
-        self.cat_filter = ctk.CTkOptionMenu(f_bar, values=["All"] + self.settings["expense_categories"], width=120, fg_color=BG_COLOR)
+        self.cat_filter = ctk.CTkOptionMenu(f_bar, values=["All"] + self.settings["expense_categories"], width=120, fg_color=BG_COLOR, command=lambda _: self.apply_history_filters())
         self.cat_filter.grid(row=0, column=2, padx=5)
+        self.cat_filter.set(filter_cat)
 
         ctk.CTkButton(f_bar, text="FILTER", width=80, fg_color=ACCENT_COLOR, text_color=BG_COLOR, command=self.apply_history_filters).grid(row=0, column=3, padx=10)
         ctk.CTkButton(f_bar, text="EXPORT", width=80, fg_color=SUCCESS_COLOR, command=self.export_to_csv).grid(row=0, column=4, padx=5)
-
-       
-        data = self.records
-        if filter_query: data = [r for r in data if filter_query.lower() in r.get('desc', "").lower()]
-        if filter_type != "All": data = [r for r in data if r['type'] == filter_type]
-        if filter_cat != "All": data = [r for r in data if r['category'] == filter_cat]
-
-        for i, r in enumerate(reversed(data)):
-            real_idx = self.records.index(r)
-            row = ctk.CTkFrame(self.main_frame, fg_color=CARD_COLOR, height=60, corner_radius=10)
-            row.pack(fill="x", padx=20, pady=3)
-            
-            dot_color = SUCCESS_COLOR if r['type'] == "Income" else ERROR_COLOR
-            ctk.CTkLabel(row, text="●", text_color=dot_color, width=20).pack(side="left", padx=(20, 10))
-            ctk.CTkLabel(row, text=r['date'], font=("Inter", 12), width=100).pack(side="left")
-            ctk.CTkLabel(row, text=r['category'].upper(), font=("Inter", 12, "bold"), width=150, anchor="w").pack(side="left")
-            ctk.CTkLabel(row, text=f"{self.currency}{r['amount']:,.2f}", font=("Inter", 14, "bold"), width=150).pack(side="left")
-            ctk.CTkButton(row, text="DELETE", fg_color="transparent", text_color=ERROR_COLOR, width=60, command=lambda idx=real_idx: self.delete_record(idx)).pack(side="right", padx=20)
+        ctk.CTkButton(f_bar, text="IMPORT", width=80, fg_color=CARD_COLOR, border_width=1, border_color=SUCCESS_COLOR, command=self.import_statement).grid(row=0, column=5, padx=5)
+
+        nav = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+        nav.pack(fill="x", padx=20, pady=(5, 0))
+        ctk.CTkButton(nav, text="◀ PREV", width=80, fg_color=CARD_COLOR, command=lambda: self.scroll_ledger(-LEDGER_PAGE_SIZE)).pack(side="left")
+        ctk.CTkButton(nav, text="NEXT ▶", width=80, fg_color=CARD_COLOR, command=lambda: self.scroll_ledger(LEDGER_PAGE_SIZE)).pack(side="left", padx=5)
+        self.page_label = ctk.CTkLabel(nav, text="", font=("Inter", 12), text_color="#94A3B8")
+        self.page_label.pack(side="left", padx=15)
+        ctk.CTkButton(nav, text="JUMP", width=60, fg_color=ACCENT_COLOR, text_color=BG_COLOR, command=self.jump_ledger_page).pack(side="right")
+        self.page_entry = ctk.CTkEntry(nav, placeholder_text="Page", width=70, fg_color=BG_COLOR)
+        self.page_entry.pack(side="right", padx=5)
+        self.page_entry.bind("<Return>", lambda e: self.jump_ledger_page())
+
+        body = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+        body.pack(fill="x", padx=20, pady=5)
+        self.ledger_scrollbar = ctk.CTkScrollbar(body, command=self.ledger_yview)
+        self.ledger_scrollbar.pack(side="right", fill="y")
+        self.ledger_body = ctk.CTkFrame(body, fg_color="transparent")
+        self.ledger_body.pack(side="left", fill="x", expand=True)
+
+        # Fixed pool of row widgets, recycled by render_ledger() as the window moves.
+        self.ledger_pool = []
+        for slot in range(LEDGER_PAGE_SIZE):
+            row = ctk.CTkFrame(self.ledger_body, fg_color=CARD_COLOR, height=60, corner_radius=10)
+            dot = ctk.CTkLabel(row, text="●", width=20)
+            dot.pack(side="left", padx=(20, 10))
+            date = ctk.CTkLabel(row, text="", font=("Inter", 12), width=100)
+            date.pack(side="left")
+            cat = ctk.CTkLabel(row, text="", font=("Inter", 12, "bold"), width=150, anchor="w")
+            cat.pack(side="left")
+            amt = ctk.CTkLabel(row, text="", font=("Inter", 14, "bold"), width=150)
+            amt.pack(side="left")
+            ctk.CTkButton(row, text="DELETE", fg_color="transparent", text_color=ERROR_COLOR, width=60, command=lambda s=slot: self.delete_ledger_slot(s)).pack(side="right", padx=20)
+            for w in (row, dot, date, cat, amt):
+                w.bind("<MouseWheel>", self.on_ledger_wheel)
+                w.bind("<Button-4>", self.on_ledger_wheel)
+                w.bind("<Button-5>", self.on_ledger_wheel)
+            self.ledger_pool.append((row, dot, date, cat, amt))
+        self.filter_ledger(filter_query, filter_type, filter_cat)
+
+    def filter_ledger(self, filter_query=None, filter_type="All", filter_cat="All", offset=0):
+        # Rows are positions into self.records, newest first. The unfiltered view is a
+        # lazy range so opening the ledger costs the same at any size.
+        self.ledger_filters = (filter_query, filter_type, filter_cat)
+        if filter_query or filter_type != "All" or filter_cat != "All":
+            self.ledger_rows = self.store.match(filter_query, filter_type, filter_cat)
+        else:
+            self.ledger_rows = range(len(self.records) - 1, -1, -1)
+        self.ledger_offset = min(max(0, offset), self.ledger_top())
+        self.render_ledger()
+
+    def ledger_top(self):
+        # The furthest the window can scroll: the start of the last page, so every page
+        # number can be reached (pool rows past the end are hidden).
+        return max(0, (len(self.ledger_rows) - 1) // LEDGER_PAGE_SIZE * LEDGER_PAGE_SIZE)
+
+    def render_ledger(self):
+        rows, off = self.ledger_rows, self.ledger_offset
+        for slot, (row, dot, date, cat, amt) in enumerate(self.ledger_pool):
+            pos = off + slot
+            if pos >= len(rows):
+                row.pack_forget()
+                continue
+            r = self.records[rows[pos]]
+            dot.configure(text_color=SUCCESS_COLOR if r['type'] == "Income" else ERROR_COLOR)
+            date.configure(text=r['date'])
+            cat.configure(text=r['category'].upper())
+            amt.configure(text=f"{self.currency}{r['amount']:,.2f}")
+            if not row.winfo_manager(): row.pack(fill="x", pady=3)
+
+        total = len(rows)
+        pages = max(1, -(-total // LEDGER_PAGE_SIZE))
+        self.page_label.configure(text=f"PAGE {off // LEDGER_PAGE_SIZE + 1}/{pages} • {total:,} ENTRIES")
+        if total: self.ledger_scrollbar.set(off / total, min(1.0, (off + LEDGER_PAGE_SIZE) / total))
+        else: self.ledger_scrollbar.set(0, 1)
+
+    def scroll_ledger(self, delta):
+        new = min(max(0, self.ledger_offset + delta), self.ledger_top())
+        if new != self.ledger_offset:
+            self.ledger_offset = new
+            self.render_ledger()
+
+    def ledger_yview(self, action, *args):
+        if action == "moveto":
+            self.scroll_ledger(int(float(args[0]) * len(self.ledger_rows)) - self.ledger_offset)
+        elif action == "scroll":
+            step = LEDGER_PAGE_SIZE if args[1] == "pages" else 1
+            self.scroll_ledger(int(args[0]) * step)
+
+    def on_ledger_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0: self.scroll_ledger(-3)
+        else: self.scroll_ledger(3)
+        return "break"
+
+    def jump_ledger_page(self):
+        try: page = int(self.page_entry.get())
+        except ValueError: return
+        self.scroll_ledger((page - 1) * LEDGER_PAGE_SIZE - self.ledger_offset)
+
+    def delete_ledger_slot(self, slot):
+        pos = self.ledger_offset + slot
+        if pos < len(self.ledger_rows): self.delete_record(self.ledger_rows[pos])
+
+    def on_search_key(self, event=None):
+        if self.search_job is not None: self.after_cancel(self.search_job)
+        self.search_job = self.after(SEARCH_DEBOUNCE_MS, self.apply_history_filters)
 
     def apply_history_filters(self):
-        self.show_history(self.search_ent.get(), self.type_filter.get(), self.cat_filter.get())
+        self.search_job = None
+        self.filter_ledger(self.search_ent.get(), self.type_filter.get(), self.cat_filter.get())
 
     def delete_record(self, idx):
+        if self.export_job is not None and self.export_job.is_alive():
+            messagebox.showinfo("EXPORT", "Wait for the running export to finish before deleting entries."); return
         if messagebox.askyesno("VERIFICATION", "Permanently delete this entry?"):
-            self.records.pop(idx); self.save_data(); self.show_history()
+            self.store.delete_record(idx); self.filter_ledger(*self.ledger_filters, offset=self.ledger_offset)
+
+    def import_statement(self, path=None, date_format=None):
+        if self.import_job is not None and self.import_job.is_alive():
+            messagebox.showinfo("IMPORT", "An import is already running."); return
+        path = path or filedialog.askopenfilename(filetypes=[("Bank statements", "*.csv *.ofx *.qfx"), ("All files", "*.*")])
+        if not path: return
+        self.import_path = path
+        # Parsing, de-duplication and index building run on a worker against a copy of the
+        # ledger columns; only the final merge happens on the Tk thread.
+        existing = self.records.copy()
+        self.import_result = None
+        self.import_progress = 0
+
+        def work():
+            try:
+                batch, report = parse_statement(path, existing, date_format=date_format, progress=lambda n: setattr(self, "import_progress", n))
+                self.import_result = (batch, report, self.store.prepare_batch(batch))
+            except Exception as e: self.import_result = e
+
+        self.import_job = threading.Thread(target=work, daemon=True)
+        self.import_job.start()
+        self.after(100, self.poll_import)
+
+    def poll_import(self):
+        ledger_open = hasattr(self, "page_label") and self.page_label.winfo_exists()
+        if self.import_job.is_alive():
+            if ledger_open: self.page_label.configure(text=f"IMPORTING... {self.import_progress:,} LINES READ")
+            self.after(100, self.poll_import); return
+        if isinstance(self.import_result, AmbiguousDates):
+            (fmt_a, day_a), (fmt_b, day_b) = list(self.import_result.readings.items())[:2]
+            choice = messagebox.askyesnocancel("DATE FORMAT", f"This statement's dates can be read two ways, e.g. {self.import_result.example}:\n\n"
+                                               f"YES: {day_a.strftime('%d %B %Y')}\nNO: {day_b.strftime('%d %B %Y')}")
+            if choice is not None: self.import_statement(self.import_path, fmt_a if choice else fmt_b)
+            return
+        if self.import_result is None:
+            messagebox.showerror("IMPORT FAILED", "The import stopped without a result."); return
+        if isinstance(self.import_result, Exception):
+            messagebox.showerror("IMPORT FAILED", str(self.import_result) or type(self.import_result).__name__); return
+        batch, report, prepared = self.import_result
+        self.import_result = None
+        self.store.add_batch(batch, prepared)
+        if report["imported"] and "Imported" in batch.categories and "Imported" not in self.settings["expense_categories"]:
+            self.settings["expense_categories"].append("Imported"); self.save_settings()
+        msg = f"Imported: {report['imported']:,}\nSkipped as duplicates: {report['duplicates']:,}\nRejected: {report['rejected']:,}"
+        if report["errors"]: msg += "\n\n" + "\n".join(report["errors"])
+        messagebox.showinfo("IMPORT COMPLETE", msg)
+        if ledger_open: self.filter_ledger(*self.ledger_filters)
 
     def export_to_csv(self):
-        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
-        if path:
-            with open(path, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(["Date", "Type", "Category", "Amount", "Description"])
-                for r in self.records: writer.writerow([r['date'], r['type'], r['category'], r['amount'], r.get('desc', "")])
-            messagebox.showinfo("EXPORT", "Data synchronized to CSV.")
+        if self.export_job is not None and self.export_job.is_alive():
+            messagebox.showinfo("EXPORT", "An export is already running."); return
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv"), ("Compressed CSV", "*.csv.gz"), ("JSON Lines", "*.jsonl")])
+        if not path: return
+        # Exports exactly the rows the ledger is showing. The worker streams them from the
+        # live columns; deletes are held off until it finishes so positions stay valid.
+        rows = self.ledger_rows
+        self.export_cancel = threading.Event()
+        self.export_progress = 0
+        self.export_result = None
+
+        def work():
+            try: self.export_result = export_records(path, self.records, rows, progress=lambda n: setattr(self, "export_progress", n), cancel=self.export_cancel)
+            except (OSError, ValueError) as e: self.export_result = e
+
+        self.export_dialog = ctk.CTkToplevel(self, fg_color=BG_COLOR)
+        self.export_dialog.title("EXPORT")
+        self.export_dialog.geometry("420x170")
+        self.export_dialog.transient(self)
+        self.export_dialog.protocol("WM_DELETE_WINDOW", self.export_cancel.set)
+        self.export_label = ctk.CTkLabel(self.export_dialog, text=f"EXPORTING {len(rows):,} ENTRIES", font=("Inter", 14, "bold"))
+        self.export_label.pack(pady=(20, 10))
+        self.export_bar = ctk.CTkProgressBar(self.export_dialog, progress_color=SUCCESS_COLOR, fg_color="#334155", width=340)
+        self.export_bar.pack(pady=10)
+        self.export_bar.set(0)
+        ctk.CTkButton(self.export_dialog, text="CANCEL", fg_color="transparent", text_color=ERROR_COLOR, command=self.export_cancel.set).pack(pady=10)
+        self.export_total = len(rows)
+        self.export_job = threading.Thread(target=work, daemon=True)
+        self.export_job.start()
+        self.after(100, self.poll_export)
+
+    def poll_export(self):
+        if self.export_job.is_alive():
+            self.export_bar.set(self.export_progress / max(1, self.export_total))
+            self.export_label.configure(text=f"EXPORTING {self.export_progress:,} / {self.export_total:,}" + (" • CANCELLING" if self.export_cancel.is_set() else ""))
+            self.after(100, self.poll_export); return
+        self.export_dialog.destroy()
+        result = self.export_result
+        if isinstance(result, Exception): messagebox.showerror("EXPORT FAILED", str(result))
+        elif result is None: messagebox.showinfo("EXPORT", "Export cancelled.")
+        else: messagebox.showinfo("EXPORT", f"{result:,} entries synchronized to file.")
+
+    def show_reports(self):
+        self.clear_frame()
+        # numpy is only needed here, so it is imported on first use rather than at startup.
+        from analytics import Reports
+        reports = Reports(self.records)
+        cur = self.currency
+        ctk.CTkLabel(self.main_frame, text="TREND ANALYTICS", font=("Inter", 12, "bold"), text_color=ACCENT_COLOR).pack(anchor="w", padx=20)
+        ctk.CTkLabel(self.main_frame, text=f"{datetime.now().strftime('%B %Y')}", font=("Inter", 32, "bold")).pack(anchor="w", padx=20, pady=(0, 20))
+
+        stats_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+        stats_frame.pack(fill="x", padx=10)
+        this_month = sum(r[1] for r in reports.month_over_month())
+        average = sum(reports.rolling_average().values())
+        ytd = reports.year_over_year()
+        self.create_hero_card(stats_frame, "Outflow This Month", this_month, ERROR_COLOR).grid(row=0, column=0, padx=10)
+        self.create_hero_card(stats_frame, "3-Month Average", average, ACCENT_COLOR).grid(row=0, column=1, padx=10)
+        self.create_hero_card(stats_frame, "Outflow Year To Date", sum(r[1] for r in ytd), "#F59E0B").grid(row=0, column=2, padx=10)
+
+        change = lambda pct: "NEW" if pct is None else f"{pct:+.1f}%"
+        change_color = lambda pct: ERROR_COLOR if pct is None or pct > 0 else SUCCESS_COLOR
+        self.create_report_table("MONTH OVER MONTH", ("Category", "This Month", "Last Month", "Change"),
+                                 [((c, f"{cur}{a:,.2f}", f"{cur}{b:,.2f}", change(p)), change_color(p)) for c, a, b, p in reports.month_over_month()[:10]])
+        self.create_report_table("YEAR OVER YEAR (TO DATE)", ("Category", "This Year", "Last Year", "Change"),
+                                 [((c, f"{cur}{a:,.2f}", f"{cur}{b:,.2f}", change(p)), change_color(p)) for c, a, b, p in ytd[:10]])
+        self.create_report_table("TOP SPENDING • LAST 12 MONTHS", ("Category", "Total", "Monthly Avg"),
+                                 [((c, f"{cur}{t:,.2f}", f"{cur}{t / 12:,.2f}"), None) for c, t in reports.top_categories(5)])
+        if self.settings["budgets"]:
+            rows = []
+            for cat, limit, spent, projected, reached in reports.burn_rate(self.settings["budgets"]):
+                ratio = projected / limit if limit > 0 else 0
+                color = SUCCESS_COLOR if ratio < 0.8 else ("#F59E0B" if ratio < 1.0 else ERROR_COLOR)
+                rows.append(((cat, f"{cur}{spent:,.2f}", f"{cur}{projected:,.2f}", f"{cur}{limit:,.2f}", f"DAY {reached}" if reached else "ON TRACK"), color))
+            self.create_report_table("BURN RATE FORECAST", ("Budget", "Spent", "Projected", "Limit", "Limit Hit"), rows)
+
+    def create_report_table(self, title, columns, rows):
+        ctk.CTkLabel(self.main_frame, text=title, font=("Inter", 12, "bold"), text_color=ACCENT_COLOR).pack(anchor="w", padx=20, pady=(30, 10))
+        table = ctk.CTkFrame(self.main_frame, fg_color=CARD_COLOR, corner_radius=15)
+        table.pack(fill="x", padx=20, pady=5)
+        for col, name in enumerate(columns):
+            table.grid_columnconfigure(col, weight=1)
+            ctk.CTkLabel(table, text=name.upper(), font=("Inter", 11, "bold"), text_color="#94A3B8").grid(row=0, column=col, padx=15, pady=(10, 5), sticky="w")
+        if not rows: ctk.CTkLabel(table, text="No activity yet.", text_color="#94A3B8").grid(row=1, column=0, padx=15, pady=(0, 10), sticky="w")
+        for i, (cells, color) in enumerate(rows, 1):
+            for col, text in enumerate(cells):
+                ctk.CTkLabel(table, text=text, font=("Inter", 13), text_color=color if color and col == len(cells) - 1 else None).grid(row=i, column=col, padx=15, pady=2, sticky="w")
 
     def show_budgets(self):
         self.clear_frame()
@@ -303,19 +630,21 @@ class ModernFinancePro(ctk.CTk):
         self.rec_cat.grid(row=0, column=2, padx=5)
         self.rec_desc = ctk.CTkEntry(form, placeholder_text="Flow Name", fg_color=BG_COLOR, width=120)
         self.rec_desc.grid(row=0, column=3, padx=5)
-        ctk.CTkButton(form, text="ACTIVATE", fg_color=ACCENT_COLOR, text_color=BG_COLOR, command=self.add_recurring).grid(row=0, column=4, padx=10)
+        self.rec_period = ctk.CTkOptionMenu(form, values=[p.capitalize() for p in PERIODS], fg_color=BG_COLOR, width=100)
+        self.rec_period.grid(row=0, column=4, padx=5)
+        ctk.CTkButton(form, text="ACTIVATE", fg_color=ACCENT_COLOR, text_color=BG_COLOR, command=self.add_recurring).grid(row=0, column=5, padx=10)
 
         for i, item in enumerate(self.settings["recurring"]):
             row = ctk.CTkFrame(self.main_frame, fg_color=CARD_COLOR)
             row.pack(fill="x", padx=40, pady=2)
-            ctk.CTkLabel(row, text=f"LOOP: {item['desc']} • {self.currency}{item['amount']}").pack(side="left", padx=20)
+            ctk.CTkLabel(row, text=f"LOOP: {item['desc']} • {self.currency}{item['amount']} • {item.get('period', 'monthly').upper()}").pack(side="left", padx=20)
             ctk.CTkButton(row, text="TERMINATE", fg_color="transparent", text_color=ERROR_COLOR, command=lambda idx=i: self.remove_recurring(idx)).pack(side="right", padx=10)
 
     def add_recurring(self):
         try:
             self.settings["recurring"].append({"type": self.rec_type.get(), "amount": float(self.rec_amt.get()), 
                                               "category": self.rec_cat.get(), "desc": self.rec_desc.get(), 
-                                              "last_billed": datetime.now().strftime("%Y-%m-%d")})
+                                              "period": self.rec_period.get().lower(), "last_billed": datetime.now().strftime("%Y-%m-%d")})
             self.save_settings(); self.show_recurring_manager()
         except: pass
 
@@ -366,5 +695,28 @@ class ModernFinancePro(ctk.CTk):
         if len(self.settings["expense_categories"]) > 1: self.settings["expense_categories"].remove(c); self.save_settings(); self.show_settings()
 
 if __name__ == "__main__":
-    app = ModernFinancePro()
+    parser = argparse.ArgumentParser(description="NEURAL FINANCE • PRO")
+    parser.add_argument("--migrate-sqlite", action="store_true", help="copy data.json and settings.json into finance.db and use SQLite from now on")
+    parser.add_argument("--force", action="store_true", help="with --migrate-sqlite, replace the records already in finance.db")
+    parser.add_argument("--check-rollup", action="store_true", help="recompute the monthly totals independently (from finance.db, or record by record for data.json), compare them with the cache and exit")
+    parser.add_argument("--startup-profile", action="store_true", help="print import, load and first-render timings, then exit")
+    parser.add_argument("--instrument", nargs="?", const="instrument.jsonl", metavar="FILE",
+                        help="log per-view render time, widget counts and save latency to FILE (default instrument.jsonl); summarize with python instrument.py FILE")
+    args = parser.parse_args()
+    if args.migrate_sqlite:
+        try: print(f"Migrated {migrate_to_sqlite(force=args.force):,} records to finance.db")
+        except (OSError, ValueError, sqlite3.Error) as e: sys.exit(f"Migration failed: {e}")
+    if args.check_rollup:
+        store = open_store()
+        store.load_records()
+        # SQLite can total the table itself, which checks the in-memory rollup against
+        # the database rather than against another build from the same columns. A JSON
+        # ledger has no aggregate on disk, so its columnar build is cross-checked against
+        # the per-record add() path instead.
+        mismatches = store.verify_database() if isinstance(store, SQLiteStore) else store.rollup.compare(Rollup(store.records.iter_dicts()).months)
+        store.close()
+        for month, key, cached, fresh in mismatches: print(f"MISMATCH {month} {key}: cached={cached} rebuilt={fresh}")
+        print(f"Rollup {'OK' if not mismatches else 'INCONSISTENT'} ({len(store.records):,} records)")
+        sys.exit(1 if mismatches else 0)
+    app = ModernFinancePro(startup_profile=args.startup_profile, instrument=args.instrument)
     app.mainloop()
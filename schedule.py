@@ -0,0 +1,66 @@
+import calendar
+from datetime import date
+
+from ledger import RecordStore, to_cents
+
+# Months advanced per occurrence; weekly flows step in days instead.
+PERIODS = {"monthly": 1, "yearly": 12, "weekly": None}
+
+
+def month_day(anchor, k, step):
+    # The k-th occurrence of a monthly/yearly schedule: the anchor's day of month,
+    # clamped to the month's length, so a flow due on the 31st (or Feb 29) never drifts.
+    m = anchor.month - 1 + k * step
+    y, m = anchor.year + m // 12, m % 12 + 1
+    return date(y, m, min(anchor.day, calendar.monthrange(y, m)[1])).toordinal()
+
+
+def due_dates(item, today):
+    # Ordinals of every occurrence after last_billed up to and including today. The
+    # first and last occurrence numbers are worked out arithmetically, so a gap of any
+    # length costs one step per missed occurrence and nothing else.
+    last = date.fromisoformat(item['last_billed'])
+    anchor = date.fromisoformat(item.get('anchor') or item['last_billed'])
+    step = PERIODS[item.get('period', "monthly")]
+    if step is None:
+        a = anchor.toordinal()
+        return range(a + ((last.toordinal() - a) // 7 + 1) * 7, today.toordinal() + 1, 7)
+    months = lambda d: ((d.year - anchor.year) * 12 + d.month - anchor.month) // step
+    first, stop = months(last), months(today)
+    if month_day(anchor, first, step) <= last.toordinal(): first += 1
+    if month_day(anchor, stop, step) > today.toordinal(): stop -= 1
+    return [month_day(anchor, k, step) for k in range(first, stop + 1)]
+
+
+def catch_up(flows, today=None):
+    # Bills every flow for all the occurrences it missed, each dated on its real due day,
+    # and moves last_billed forward in place. Returns one RecordStore batch in date order
+    # so the caller can commit the whole catch-up with a single write. `today` can be
+    # passed in to replay a schedule against a simulated clock. Every flow is read before
+    # any is moved forward, so one bad flow raises with all of them left untouched.
+    today = today or date.today()
+    due = [(i, days) for i, days in enumerate(due_dates(item, today) for item in flows) if days]
+    rows = [(item['type'], to_cents(item['amount']), item['category'], f"AUTOPAY: {item['desc']}") for item in flows]
+    # Occurrences are keyed day * n + flow so one integer sort puts the batch in date order.
+    n = len(flows)
+    keys = sorted(day * n + i for i, days in due for day in days)
+    batch = RecordStore()
+    add = batch.add_parsed
+    for key in keys:
+        day, i = divmod(key, n)
+        rtype, cents, category, desc = rows[i]
+        add(rtype, cents, category, desc, day)
+    for i, days in due:
+        item = flows[i]
+        item.setdefault('anchor', item['last_billed'])
+        item['last_billed'] = date.fromordinal(days[-1]).isoformat()
+    return batch
+
+
+def bill_recurring(store, settings, today=None):
+    # The startup catch-up: every missed occurrence is billed on its own due date, and the
+    # whole catch-up lands as one batch plus one settings write however long the app was
+    # closed. Returns the number of entries billed.
+    batch = catch_up(settings.get("recurring", []), today)
+    if len(batch): store.add_batch(batch); store.save_settings(settings)
+    return len(batch)
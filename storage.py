@@ -0,0 +1,568 @@
+import bisect
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from functools import partial
+
+from ledger import RecordStore, Rollup, SearchIndex
+
+# data.json holds a snapshot, data.journal holds one line per add/delete made since.
+# Every line carries a sequence number and the snapshot records the last one it
+# folded in, so a crash at any point during compaction replays cleanly.
+COMPACT_EVERY = 2000
+# Batches up to this size (a recurring catch-up, a short statement) go to the journal
+# as one line; bigger imports are cheaper to fold into a fresh snapshot.
+JOURNAL_BATCH_MAX = 1000
+COALESCE_WINDOW = 0.05
+
+
+def atomic_write_json(path, obj, **kw):
+    atomic_write_text(path, json.dumps(obj, **kw))
+
+
+def atomic_write_text(path, text):
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+        f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def atomic_write_snapshot(path, seq, records):
+    # Streams one record per line so a snapshot never needs a second in-memory copy of the ledger.
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        f.write(f'{{"seq":{seq},"records":[')
+        for i, r in enumerate(records.iter_dicts()):
+            f.write(("\n" if i == 0 else ",\n") + json.dumps(r, separators=(",", ":")))
+        f.write("\n]}\n")
+        f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class PersistenceWorker:
+    # Runs a store's disk writes on one background thread, in submission order. A job
+    # submitted under a key that is already queued replaces the queued one in place, so
+    # a burst of edits inside COALESCE_WINDOW costs one physical write per key.
+    def __init__(self, window=COALESCE_WINDOW):
+        self.window = window
+        self.writes = 0
+        self.error = None
+        # Optional trace(key, waited, took) hook, called after each write with the seconds
+        # the job sat in the queue (from its first submission) and the seconds it took.
+        self.trace = None
+        self._jobs = {}
+        self._queued = {}
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, key, fn):
+        with self._cond:
+            self._jobs[key] = fn
+            self._queued.setdefault(key, time.perf_counter())
+            self._cond.notify_all()
+
+    def idle(self):
+        with self._cond: return not self._jobs and not self._busy
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._jobs and not self._closed: self._cond.wait()
+                if not self._jobs: return
+            if not self._closed: time.sleep(self.window)
+            with self._cond:
+                jobs, self._jobs = list(self._jobs.items()), {}
+                queued, self._queued = self._queued, {}
+                self._busy = True
+            for key, fn in jobs:
+                t = time.perf_counter()
+                try: fn()
+                except Exception as e:
+                    if self.error is None: self.error = e
+                self.writes += 1
+                if self.trace is not None: self.trace(key, t - queued[key], time.perf_counter() - t)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def flush(self):
+        with self._cond:
+            while self._jobs or self._busy:
+                self._cond.notify_all()
+                self._cond.wait(0.1)
+        self.check()
+
+    def check(self):
+        # Raises the first write error since the last check. A store keeps whatever failed
+        # queued in memory, so the caller can report it and call retry().
+        error, self.error = self.error, None
+        if error is not None: raise error
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.check()
+
+
+class Matches:
+    # Keyword hits as a newest-first sequence of ledger positions. Only the hit uids are
+    # sorted up front; a uid becomes a position (one bisect) when its row is read, so a
+    # page of a 200k-hit query costs LEDGER_PAGE_SIZE bisects, not 200k. Like the position
+    # lists it replaces, it is meant to be rebuilt after a delete.
+    __slots__ = ("uids", "_all")
+
+    def __init__(self, all_uids, hits):
+        self._all = all_uids
+        self.uids = sorted(hits, reverse=True)
+
+    def __len__(self): return len(self.uids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice): return [bisect.bisect_left(self._all, uid) for uid in self.uids[i]]
+        return bisect.bisect_left(self._all, self.uids[i])
+
+    def __iter__(self):
+        return map(partial(bisect.bisect_left, self._all), self.uids)
+
+    def __reversed__(self):
+        return map(partial(bisect.bisect_left, self._all), reversed(self.uids))
+
+
+class Store:
+    # records[i] is identified by uids[i]. uids only ever grow, so the array stays sorted
+    # and a uid maps back to its current position with a bisect.
+    #
+    # load_records() builds the whole ledger before touching any state and raises on
+    # anything it cannot read. The error is kept in load_error, and while it is set the
+    # store stays usable in memory but writes nothing, so a compaction can never replace
+    # the files it failed to read.
+    load_error = None
+
+    def _build_indexes(self):
+        self.rollup = Rollup(self.records)
+        self.search = SearchIndex.from_columns(self.uids, self.records)
+
+    def _index_added(self, recs, uids):
+        self.records.extend(recs)
+        self.uids.extend(uids)
+        for uid, r in zip(uids, recs):
+            self.rollup.add(r)
+            self.search.add(uid, r)
+
+    def prepare_batch(self, batch):
+        # The expensive part of add_batch, safe to run off the Tk thread. It guesses the
+        # uids the batch will get; add_batch rebuilds if records were added meanwhile.
+        uids = range(self.next_uid, self.next_uid + len(batch))
+        return uids, Rollup(batch), SearchIndex.from_columns(uids, batch)
+
+    def _index_batch(self, batch, prepared):
+        uids = range(self.next_uid, self.next_uid + len(batch))
+        if prepared is None or prepared[0] != uids: prepared = (uids, Rollup(batch), SearchIndex.from_columns(uids, batch))
+        _, rollup, search = prepared
+        self.next_uid += len(batch)
+        self.records.extend_columns(batch)
+        self.uids.extend(uids)
+        self.rollup.merge(rollup)
+        self.search.merge(search)
+        return uids
+
+    def _index_removed(self, idx):
+        r, uid = self.records.pop(idx), self.uids.pop(idx)
+        self.rollup.remove(r)
+        self.search.remove(uid, r)
+        return r
+
+    def month_totals(self, month):
+        return self.rollup.month_totals(month)
+
+    def category_totals(self, rtype):
+        return self.rollup.category_totals(rtype)
+
+    def verify_rollup(self):
+        mismatches = self.rollup.diff(self.records)
+        if mismatches: self.rollup = Rollup(self.records)
+        return mismatches
+
+    def match(self, query=None, rtype="All", category="All"):
+        recs, uids = self.records, self.uids
+        hits = self.search.search(query) if query else None
+        if hits is None: return recs.filter_positions(range(len(recs) - 1, -1, -1), rtype, category) if rtype != "All" or category != "All" else list(range(len(recs) - 1, -1, -1))
+        if rtype == "All" and category == "All": return Matches(uids, hits)
+        # Combined with a type/category filter every hit needs its position. A dense hit
+        # set is cheaper to test during one pass over the filtered rows than to bisect.
+        if len(hits) * 8 > len(recs):
+            return [i for i in recs.filter_positions(range(len(recs) - 1, -1, -1), rtype, category) if uids[i] in hits]
+        return recs.filter_positions(sorted((bisect.bisect_left(uids, uid) for uid in hits), reverse=True), rtype, category)
+
+    def compact(self, wait=False): pass
+
+    def flush(self):
+        self.worker.flush()
+
+    def retry(self): pass
+
+    def close(self):
+        self.worker.close()
+
+
+class JsonStore(Store):
+    def __init__(self, data_file="data.json", settings_file="settings.json", compact_every=COMPACT_EVERY):
+        self.data_file = data_file
+        self.settings_file = settings_file
+        self.journal_file = os.path.splitext(data_file)[0] + ".journal"
+        self.rotated_file = self.journal_file + ".old"
+        self.compact_every = compact_every
+        self.records = RecordStore()
+        self.uids = array('q')
+        self.next_uid = 1
+        self._build_indexes()
+        self.seq = 0
+        self.journal_lines = 0
+        self._journal = None
+        # Journal lines waiting for the worker, grouped by compaction generation so lines
+        # queued after a snapshot was taken can never be folded into the rotated journal.
+        self._gen = 0
+        self._pending = {}
+        self._write_failed = False
+        self._lock = threading.Lock()
+        self.worker = PersistenceWorker()
+
+    def load_records(self):
+        try:
+            snap_seq, records = 0, []
+            if os.path.exists(self.data_file):
+                with open(self.data_file, 'r') as f:
+                    try: data = json.load(f)
+                    except ValueError as e: raise ValueError(f"{self.data_file} is corrupt: {e}") from None
+                if isinstance(data, list): records = data
+                else: snap_seq, records = data.get("seq", 0), data.get("records", [])
+            try: records = RecordStore(records)
+            except (KeyError, ValueError, TypeError) as e: raise ValueError(f"{self.data_file} has a bad record: {e!r}") from None
+            data = None
+            seq, torn = snap_seq, []
+            for path in (self.rotated_file, self.journal_file):
+                seq, good = self._replay(path, snap_seq, records, seq)
+                if good is not None and good != os.path.getsize(path): torn.append((path, good))
+        except (OSError, ValueError) as e:
+            self.load_error = e
+            raise
+        # Everything parsed and applied: only now is a torn tail from an interrupted
+        # append cut off, so later appends start on a clean line.
+        for path, good in torn:
+            with open(path, 'r+b') as f: f.truncate(good)
+        self.load_error = None
+        self.records, self.seq = records, seq
+        self.journal_lines = self._count_lines(self.rotated_file) + self._count_lines(self.journal_file)
+        self.uids = array('q', range(1, len(self.records) + 1))
+        self.next_uid = len(self.records) + 1
+        self._build_indexes()
+        return self.records
+
+    def _replay(self, path, snap_seq, records, seq):
+        # Applies one journal file to records and returns (last seq, bytes of intact
+        # lines). Only the final line may be torn; a bad line anywhere else, or an entry
+        # that does not apply, fails the whole load.
+        if not os.path.exists(path): return seq, None
+        with open(path, 'rb') as f: lines = f.readlines()
+        good = 0
+        for n, line in enumerate(lines, 1):
+            try:
+                if not line.endswith(b"\n"): raise ValueError("line is incomplete")
+                entry = json.loads(line)
+            except ValueError:
+                if n == len(lines): break
+                raise ValueError(f"{path} line {n} is corrupt") from None
+            good += len(line)
+            try:
+                if entry["seq"] <= snap_seq: continue
+                self._apply(records, entry)
+            except (KeyError, ValueError, TypeError, IndexError) as e:
+                raise ValueError(f"{path} line {n} cannot be applied: {e!r}") from None
+            seq = entry["seq"]
+        return seq, good
+
+    def _apply(self, records, entry):
+        if entry["op"] == "add": records.extend(entry["recs"])
+        elif entry["op"] == "del": records.pop(entry["idx"])
+        else: raise ValueError(f"unknown op {entry['op']!r}")
+
+    def _count_lines(self, path):
+        if not os.path.exists(path): return 0
+        with open(path, 'rb') as f: return sum(1 for _ in f)
+
+    def _append(self, entry):
+        if self.load_error is not None: return
+        self.seq += 1
+        entry["seq"] = self.seq
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode()
+        with self._lock: self._pending.setdefault(self._gen, []).append(line)
+        self.worker.submit(("journal", self._gen), partial(self._write_journal, self._gen))
+        self.journal_lines += 1
+        if self.journal_lines >= self.compact_every: self.compact()
+
+    def _write_journal(self, gen):
+        # Writes every line pending up to this generation, oldest first: lines left over
+        # from a failed write always land before anything queued after them.
+        with self._lock:
+            gens = sorted(g for g in self._pending if g <= gen)
+            lines = [line for g in gens for line in self._pending.pop(g)]
+        if not lines: return
+        try:
+            if self._journal is None: self._journal = open(self.journal_file, 'ab')
+            pos = self._journal.tell()
+            try:
+                self._journal.write(b"".join(lines))
+                self._journal.flush(); os.fsync(self._journal.fileno())
+            except OSError:
+                # Cut off whatever part of the write landed, so the retry cannot leave a torn
+                # line in the middle of the journal.
+                journal, self._journal = self._journal, None
+                try: journal.close()
+                except OSError: pass
+                try: os.truncate(self.journal_file, pos)
+                except OSError: pass
+                raise
+        except OSError:
+            with self._lock: self._pending.setdefault(gens[0], [])[:0] = lines
+            self._write_failed = True
+            raise
+        self._write_failed = False
+
+    def add_records(self, recs):
+        recs = list(recs)
+        if not recs: return
+        self._index_added(recs, range(self.next_uid, self.next_uid + len(recs)))
+        self.next_uid += len(recs)
+        self._append({"op": "add", "recs": recs})
+
+    def add_batch(self, batch, prepared=None):
+        if not len(batch): return
+        self._index_batch(batch, prepared)
+        if len(batch) > JOURNAL_BATCH_MAX: self.compact()
+        else: self._append({"op": "add", "recs": list(batch.iter_dicts())})
+
+    def delete_record(self, idx):
+        self._index_removed(idx)
+        self._append({"op": "del", "idx": idx})
+
+    def compact(self, wait=False):
+        if self.load_error is not None: return
+        gen, self._gen = self._gen, self._gen + 1
+        self.worker.submit(("compact", gen), partial(self._write_snapshot, gen, self.records.copy(), self.seq))
+        self.journal_lines = 0
+        if wait: self.worker.flush()
+
+    def _write_snapshot(self, gen, snapshot, seq):
+        self._write_journal(gen)
+        if self._journal is not None: self._journal.close(); self._journal = None
+        # Appends made from here on go to a fresh journal. An older rotated file only
+        # exists if a previous compaction died, and it is still needed.
+        if os.path.exists(self.journal_file) and not os.path.exists(self.rotated_file):
+            os.replace(self.journal_file, self.rotated_file)
+        atomic_write_snapshot(self.data_file, seq, snapshot)
+        if os.path.exists(self.rotated_file): os.remove(self.rotated_file)
+
+    def load_settings(self):
+        if not os.path.exists(self.settings_file): return None
+        with open(self.settings_file, 'r') as f:
+            try: return json.load(f)
+            except ValueError: return None
+
+    def save_settings(self, settings):
+        self.worker.submit("settings", partial(atomic_write_text, self.settings_file, json.dumps(settings, indent=4)))
+
+    def retry(self):
+        # A compaction writes any journal lines still pending first, then a fresh snapshot.
+        self.compact()
+
+    def close(self):
+        # Lines still queued are written by the worker as it shuts down; only lines left
+        # behind by a failed write need the retry's fresh snapshot.
+        if self._write_failed: self.retry()
+        try: self.worker.close()
+        finally:
+            if self._journal is not None: self._journal.close(); self._journal = None
+
+
+class SQLiteStore(Store):
+    def __init__(self, db_file="finance.db"):
+        self.db_file = db_file
+        self.records = RecordStore()
+        self.uids = array('q')
+        self.next_uid = 1
+        self._build_indexes()
+        self._sql = []
+        self._queue_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self.worker = PersistenceWorker()
+        self.db = sqlite3.connect(db_file, check_same_thread=False)
+        self.db.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                type TEXT NOT NULL, amount REAL NOT NULL, category TEXT NOT NULL,
+                desc TEXT NOT NULL DEFAULT '', date TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS idx_records_date ON records(date);
+            CREATE INDEX IF NOT EXISTS idx_records_type_date ON records(type, date);
+            CREATE INDEX IF NOT EXISTS idx_records_category ON records(category, type);
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+
+    def load_records(self):
+        records, uids = RecordStore(), array('q')
+        add = records.add_row
+        try:
+            with self._db_lock:
+                for row in self.db.execute("SELECT id, type, amount, category, desc, date FROM records ORDER BY id"):
+                    try: add(*row[1:])
+                    except (ValueError, TypeError) as e: raise ValueError(f"record {row[0]} in {self.db_file} is bad: {e!r}") from None
+                    uids.append(row[0])
+                seq = self.db.execute("SELECT seq FROM sqlite_sequence WHERE name = 'records'").fetchone()
+        except (ValueError, sqlite3.Error) as e:
+            self.load_error = e
+            raise
+        self.load_error = None
+        self.records, self.uids = records, uids
+        # Row ids are handed out here rather than by INSERT so the in-memory ledger can be
+        # updated straight away while the worker writes the rows later.
+        self.next_uid = max(seq[0] if seq else 0, self.uids[-1] if self.uids else 0) + 1
+        self._build_indexes()
+        return self.records
+
+    def _queue(self, sql, rows):
+        if self.load_error is not None: return
+        with self._queue_lock: self._sql.append((sql, rows))
+        self.worker.submit("sql", self._write_sql)
+
+    def _write_sql(self):
+        with self._queue_lock: batch, self._sql = self._sql, []
+        if not batch: return
+        # Rows are materialized so a failed transaction (rolled back as a whole) can be
+        # put back at the front of the queue and retried.
+        batch = [(sql, list(rows)) for sql, rows in batch]
+        try:
+            with self._db_lock, self.db:
+                for sql, rows in batch: self.db.executemany(sql, rows)
+        except sqlite3.Error:
+            with self._queue_lock: self._sql[:0] = batch
+            raise
+
+    def add_records(self, recs):
+        recs = list(recs)
+        if not recs: return
+        uids = range(self.next_uid, self.next_uid + len(recs))
+        self.next_uid += len(recs)
+        self._queue("INSERT INTO records (id, type, amount, category, desc, date) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(uid, r['type'], r['amount'], r['category'], r.get('desc', ""), r['date']) for uid, r in zip(uids, recs)])
+        self._index_added(recs, uids)
+
+    def add_batch(self, batch, prepared=None):
+        if not len(batch): return
+        uids = self._index_batch(batch, prepared)
+        self._queue("INSERT INTO records (id, type, amount, category, desc, date) VALUES (?, ?, ?, ?, ?, ?)",
+                    ((uid, r['type'], r['amount'], r['category'], r['desc'], r['date']) for uid, r in zip(uids, batch.iter_dicts())))
+
+    def delete_record(self, idx):
+        self._queue("DELETE FROM records WHERE id = ?", [(self.uids[idx],)])
+        self._index_removed(idx)
+
+    def query_totals(self):
+        # The rollup's cells recomputed by SQLite straight from the table, independent of
+        # anything held in memory. Used by --check-rollup, so waiting for the worker is fine.
+        self.flush()
+        with self._db_lock:
+            rows = self.db.execute("SELECT substr(date, 1, 7), type, category, SUM(CAST(ROUND(amount * 100) AS INTEGER)), COUNT(*) "
+                                   "FROM records GROUP BY 1, 2, 3").fetchall()
+        months = {}
+        for month, t, c, cents, count in rows:
+            for name in (month, "ALL"):
+                cell = months.setdefault(name, {}).setdefault((t, c), [0, 0])
+                cell[0] += cents
+                cell[1] += count
+        return months
+
+    def verify_database(self):
+        return self.rollup.compare(self.query_totals())
+
+    def match(self, query=None, rtype="All", category="All"):
+        # Keyword search goes through the in-memory token index. Plain type/category
+        # filters use the SQL indexes, unless the worker still has edits queued or is
+        # writing: then the table lags the in-memory ledger (and the UI must not wait
+        # on the write), so the columns are filtered instead. After a failed load the
+        # table and the (empty) columns disagree, so the columns are used then too.
+        if query or (rtype == "All" and category == "All") or self.load_error is not None: return super().match(query, rtype, category)
+        where, args = [], []
+        if rtype != "All": where.append("type = ?"); args.append(rtype)
+        if category != "All": where.append("category = ?"); args.append(category)
+        sql = "SELECT id FROM records WHERE " + " AND ".join(where) + " ORDER BY id DESC"
+        if not self._db_lock.acquire(blocking=False): return super().match(query, rtype, category)
+        try:
+            if self._sql or not self.worker.idle(): return super().match(query, rtype, category)
+            rows = self.db.execute(sql, args).fetchall()
+        finally: self._db_lock.release()
+        uids = self.uids
+        return [bisect.bisect_left(uids, rowid) for (rowid,) in rows]
+
+    def load_settings(self):
+        with self._db_lock: row = self.db.execute("SELECT value FROM settings WHERE key = 'settings'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_settings(self, settings):
+        self.worker.submit("settings", partial(self._write_settings, json.dumps(settings)))
+
+    def _write_settings(self, text):
+        with self._db_lock, self.db: self.db.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('settings', ?)", (text,))
+
+    def retry(self):
+        if self._sql: self.worker.submit("sql", self._write_sql)
+
+    def close(self):
+        self.retry()
+        try: self.worker.close()
+        finally: self.db.close()
+
+
+def open_store(data_file="data.json", settings_file="settings.json", db_file="finance.db"):
+    if os.path.exists(db_file): return SQLiteStore(db_file)
+    return JsonStore(data_file, settings_file)
+
+
+def migrate_to_sqlite(data_file="data.json", settings_file="settings.json", db_file="finance.db", force=False):
+    # Replaces the database's records and settings with the JSON ledger's. The app stops
+    # writing data.json once finance.db exists, so a second run would throw away every
+    # entry made since the first: a database that already has records is only overwritten
+    # with force=True, and there must be a JSON ledger (snapshot or journal) to copy.
+    src = JsonStore(data_file, settings_file)
+    if not os.path.exists(data_file) and not os.path.exists(src.journal_file):
+        src.close()
+        raise ValueError(f"{data_file} not found, nothing to migrate")
+    if not force and os.path.exists(db_file):
+        with sqlite3.connect(db_file) as db:
+            try: has_records = db.execute("SELECT EXISTS (SELECT 1 FROM records)").fetchone()[0]
+            except sqlite3.OperationalError: has_records = False
+        db.close()
+        if has_records:
+            src.close()
+            raise ValueError(f"{db_file} already holds records; migrating again would replace them with {data_file}")
+    try:
+        records = src.load_records()
+        settings = src.load_settings()
+    finally: src.close()
+    dst = SQLiteStore(db_file)
+    with dst.db:
+        dst.db.execute("DELETE FROM records")
+        dst.db.executemany("INSERT INTO records (type, amount, category, desc, date) VALUES (?, ?, ?, ?, ?)",
+                           ((r['type'], r['amount'], r['category'], r['desc'], r['date']) for r in records.iter_dicts()))
+    if settings is not None: dst.save_settings(settings)
+    dst.close()
+    return len(records)
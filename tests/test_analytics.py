@@ -0,0 +1,122 @@
+import calendar
+import math
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+
+import pytest
+
+from analytics import Reports
+from ledger import RecordStore
+
+TODAY = date(2026, 10, 18)
+CATEGORIES = ["Food", "Rent", "Transport", "Fun", "Gifts", "Travel", "Misc"]
+
+
+def month_of(d):
+    return (d.year - 1970) * 12 + d.month - 1
+
+
+@pytest.fixture(scope="module")
+def records():
+    rng = random.Random(12)
+    start = date(2024, 11, 1)
+    rows = []
+    for _ in range(3000):
+        d = start + timedelta(days=rng.randrange((TODAY - start).days + 1))
+        rtype = "Income" if rng.random() < 0.15 else "Expense"
+        # Travel only appears this year and Gifts only last year, so NEW and vanished rows are covered.
+        cat = rng.choice(CATEGORIES)
+        if cat == "Travel" and d.year < 2026: cat = "Misc"
+        if cat == "Gifts" and d.year == 2026: cat = "Food"
+        rows.append({"type": rtype, "amount": rng.randrange(1, 50000) / 100, "category": cat, "desc": "", "date": d.isoformat()})
+    return RecordStore(rows)
+
+
+@pytest.fixture(scope="module")
+def reports(records):
+    return Reports(records, today=TODAY)
+
+
+def totals(records, rtype, months):
+    out = defaultdict(int)
+    for r in records.iter_dicts():
+        if r["type"] == rtype and month_of(date.fromisoformat(r["date"])) in months: out[r["category"]] += round(r["amount"] * 100)
+    return out
+
+
+def check_compare(result, cur, prev):
+    cats = {c for c in set(cur) | set(prev) if cur[c] or prev[c]}
+    assert {c for c, *_ in result} == cats
+    for c, a, b, pct in result:
+        assert (a, b) == (cur[c] / 100, prev[c] / 100)
+        assert pct == (pytest.approx((cur[c] - prev[c]) / prev[c] * 100) if prev[c] else None)
+    moves = [abs(a - b) for _, a, b, _ in result]
+    assert moves == sorted(moves, reverse=True)
+
+
+@pytest.mark.parametrize("rtype", ["Expense", "Income"])
+def test_month_over_month(records, reports, rtype):
+    m = month_of(TODAY)
+    check_compare(reports.month_over_month(rtype), totals(records, rtype, {m}), totals(records, rtype, {m - 1}))
+
+
+def test_month_over_month_for_an_earlier_month(records, reports):
+    m = month_of(date(2025, 3, 1))
+    check_compare(reports.month_over_month(month=m), totals(records, "Expense", {m}), totals(records, "Expense", {m - 1}))
+
+
+def test_year_over_year_to_date(records, reports):
+    m = month_of(TODAY)
+    this_year = set(range(m - TODAY.month + 1, m + 1))
+    result = reports.year_over_year()
+    check_compare(result, totals(records, "Expense", this_year), totals(records, "Expense", {x - 12 for x in this_year}))
+    assert dict((c, pct) for c, _, _, pct in result)["Travel"] is None
+
+
+@pytest.mark.parametrize("window", [1, 3, 6])
+def test_rolling_average(records, reports, window):
+    m = month_of(TODAY)
+    sums = totals(records, "Expense", set(range(m - window, m)))
+    assert reports.rolling_average(window=window) == pytest.approx({c: cents / 100 / window for c, cents in sums.items() if cents})
+
+
+def test_rolling_average_divides_by_the_months_the_ledger_has():
+    records = RecordStore([{"type": "Expense", "amount": 90.0, "category": "Food", "desc": "", "date": "2026-09-05"}])
+    assert Reports(records, today=TODAY).rolling_average(window=3) == {"Food": 90.0}
+
+
+@pytest.mark.parametrize("n,months", [(5, 12), (3, 1), (10, None)])
+def test_top_categories(records, reports, n, months):
+    m = month_of(TODAY)
+    window = set(range(month_of(date(2024, 11, 1)), m + 1)) if months is None else set(range(m - months + 1, m + 1))
+    sums = totals(records, "Expense", window)
+    expected = sorted(((c, cents / 100) for c, cents in sums.items() if cents > 0), key=lambda x: -x[1])[:n]
+    assert reports.top_categories(n, months=months) == expected
+
+
+def test_burn_rate(records, reports):
+    budgets = {"FOOD": 6000.0, "Rent": 10.0, "Travel": 1e9, "Nothing": 50.0}
+    spent = {c.lower(): cents / 100 for c, cents in totals(records, "Expense", {month_of(TODAY)}).items()}
+    length = calendar.monthrange(TODAY.year, TODAY.month)[1]
+    result = reports.burn_rate(budgets)
+    assert [r[0] for r in result] == list(budgets)
+    for name, limit, got_spent, projected, reached in result:
+        s = spent.get(name.lower(), 0.0)
+        assert (limit, got_spent) == (budgets[name], pytest.approx(s))
+        assert projected == pytest.approx(s / TODAY.day * length)
+        if s >= limit: want = TODAY.day
+        elif s == 0: want = None
+        else:
+            day = math.ceil(limit / (s / TODAY.day))
+            want = day if day <= length else None
+        assert reached == want
+    assert [r[4] for r in result] == [25, TODAY.day, None, None]
+    assert reports.burn_rate({}) == []
+
+
+def test_empty_ledger():
+    reports = Reports(RecordStore(), today=TODAY)
+    assert reports.month_over_month() == [] and reports.year_over_year() == []
+    assert reports.rolling_average() == {} and reports.top_categories() == []
+    assert reports.burn_rate({"Food": 100.0}) == [("Food", 100.0, 0.0, 0.0, None)]
@@ -0,0 +1,85 @@
+import csv
+import gzip
+import json
+import threading
+
+import pytest
+
+import exporter
+from exporter import export_records
+from ledger import RecordStore
+
+TRICKY = ['plain', 'say "hi"', 'comma, inside', 'back\\slash \\" mixed', 'line\nbreak', 'tab\tand \x01 control', 'café ☕', '']
+
+
+def ledger():
+    return RecordStore({"type": "Expense" if i % 3 else "Income", "amount": i + 0.5, "category": ("Food", "Rent")[i % 2],
+                        "desc": TRICKY[i % len(TRICKY)], "date": f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}"} for i in range(40))
+
+
+def expected(records, positions):
+    return [(records.iso(records.days[i]), records.types[records.type_ids[i]], records.categories[records.cat_ids[i]],
+             f"{records.cents[i] / 100:.2f}", records.descs[i]) for i in reversed(positions)]
+
+
+def read_back(path, fmt):
+    if fmt == "jsonl":
+        with open(path, newline='') as f:
+            return [(r["date"], r["type"], r["category"], f"{r['amount']:.2f}", r["desc"]) for r in map(json.loads, f)]
+    opener = gzip.open if fmt == "csv.gz" else open
+    with opener(path, 'rt', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == exporter.HEADER
+    return [tuple(r) for r in rows[1:]]
+
+
+@pytest.mark.parametrize("name,fmt", [("out.csv", "csv"), ("out.csv.gz", "csv.gz"), ("out.jsonl", "jsonl")])
+def test_every_format_round_trips(tmp_path, name, fmt):
+    records = ledger()
+    positions = range(len(records) - 1, -1, -1)
+    path = str(tmp_path / name)
+    assert export_records(path, records, positions) == len(records)
+    assert read_back(path, fmt) == expected(records, positions)
+    assert not (tmp_path / (name + ".part")).exists()
+
+
+def test_jsonl_lines_are_one_object_each(tmp_path):
+    records = ledger()
+    path = tmp_path / "out.jsonl"
+    export_records(str(path), records, range(len(records) - 1, -1, -1))
+    assert len(path.read_bytes().splitlines()) == len(records)
+
+
+@pytest.mark.parametrize("name", ["out.csv", "out.jsonl"])
+def test_filtered_rows_come_out_oldest_first(tmp_path, name):
+    records = ledger()
+    positions = [i for i in range(len(records) - 1, -1, -1) if records.categories[records.cat_ids[i]] == "Rent"]
+    path = str(tmp_path / name)
+    assert export_records(path, records, positions) == len(positions)
+    rows = read_back(path, exporter.format_for(path))
+    assert rows == expected(records, positions)
+    assert [float(r[3]) for r in rows] == sorted(float(r[3]) for r in rows)
+
+
+def test_cancel_removes_the_partial_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporter, "PROGRESS_EVERY", 7)
+    records = ledger()
+    cancel = threading.Event()
+    seen = []
+
+    def progress(n):
+        seen.append(n)
+        cancel.set()
+
+    path = tmp_path / "out.csv.gz"
+    assert export_records(str(path), records, range(len(records) - 1, -1, -1), progress=progress, cancel=cancel) is None
+    assert seen == [7]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_export_leaves_nothing_behind(tmp_path):
+    records = ledger()
+    path = tmp_path / "out.csv"
+    with pytest.raises(IndexError):
+        export_records(str(path), records, [0, len(records) + 5])
+    assert list(tmp_path.iterdir()) == []
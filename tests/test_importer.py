@@ -0,0 +1,77 @@
+import pytest
+
+from importer import AmbiguousDates, parse_statement
+from ledger import RecordStore
+
+
+def write_csv(tmp_path, rows, name="stmt.csv"):
+    path = tmp_path / name
+    path.write_text("Date,Description,Amount\n" + "".join(f"{d},{desc},{amt}\n" for d, desc, amt in rows))
+    return str(path)
+
+
+def dates(batch):
+    return [batch.iso(d) for d in batch.days]
+
+
+def test_us_statement_is_read_month_first_throughout(tmp_path):
+    path = write_csv(tmp_path, [("10/05/2026", "coffee", "-3.50"), ("10/07/2026", "rent", "-900"), ("10/13/2026", "salary", "2500")])
+    batch, report = parse_statement(path, RecordStore())
+    assert dates(batch) == ["2026-10-05", "2026-10-07", "2026-10-13"]
+    assert report["rejected"] == 0
+
+
+def test_uk_statement_is_read_day_first_throughout(tmp_path):
+    path = write_csv(tmp_path, [("05/10/2026", "coffee", "-3.50"), ("13/10/2026", "salary", "2500")])
+    batch, _ = parse_statement(path, RecordStore())
+    assert dates(batch) == ["2026-10-05", "2026-10-13"]
+
+
+def test_ambiguous_statement_is_rejected_until_a_format_is_chosen(tmp_path):
+    path = write_csv(tmp_path, [("10/05/2026", "coffee", "-3.50"), ("11/06/2026", "rent", "-900")])
+    with pytest.raises(AmbiguousDates) as err:
+        parse_statement(path, RecordStore())
+    assert set(err.value.readings) == {"%d/%m/%Y", "%m/%d/%Y"}
+    batch, _ = parse_statement(path, RecordStore(), date_format="%m/%d/%Y")
+    assert dates(batch) == ["2026-10-05", "2026-11-06"]
+
+
+def test_explicit_format_rejects_rows_that_do_not_fit(tmp_path):
+    path = write_csv(tmp_path, [("13/10/2026", "coffee", "-3.50"), ("10/05/2026", "rent", "-900")])
+    batch, report = parse_statement(path, RecordStore(), date_format="%m/%d/%Y")
+    assert dates(batch) == ["2026-10-05"]
+    assert report["rejected"] == 1
+
+
+def test_iso_and_agreeing_dates_need_no_choice(tmp_path):
+    path = write_csv(tmp_path, [("2026-10-05", "coffee", "-3.50"), ("2026-10-06T09:00:00", "rent", "-900")])
+    assert dates(parse_statement(path, RecordStore())[0]) == ["2026-10-05", "2026-10-06"]
+    path = write_csv(tmp_path, [("05/05/2026", "coffee", "-3.50")], name="same.csv")
+    assert dates(parse_statement(path, RecordStore())[0]) == ["2026-05-05"]
+
+
+def test_reimport_is_all_duplicates(tmp_path):
+    path = write_csv(tmp_path, [("10/05/2026", "coffee", "-3.50"), ("10/13/2026", "coffee", "-3.50"), ("10/13/2026", "coffee", "-3.50")])
+    batch, _ = parse_statement(path, RecordStore())
+    again, report = parse_statement(path, batch)
+    assert len(again) == 0 and report["duplicates"] == 3
+
+
+def test_ofx(tmp_path):
+    path = tmp_path / "stmt.ofx"
+    path.write_text("<OFX><BANKTRANLIST>"
+                    "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20261005120000[-5:EST]<TRNAMT>-12.50<NAME>Grocer</STMTTRN>"
+                    "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20261013<TRNAMT>100.00<NAME>Payroll<MEMO>Oct</STMTTRN>"
+                    "</BANKTRANLIST></OFX>")
+    batch, _ = parse_statement(str(path), RecordStore())
+    assert [r for r in batch.iter_dicts()] == [
+        {"type": "Expense", "amount": 12.5, "category": "Imported", "desc": "Grocer", "date": "2026-10-05"},
+        {"type": "Income", "amount": 100.0, "category": "Imported", "desc": "Payroll Oct", "date": "2026-10-13"}]
+
+
+@pytest.mark.parametrize("amount", ["inf", "-inf", "1e400", "nan", "1e300", "(inf)"])
+def test_out_of_range_amounts_are_rejected_rows(tmp_path, amount):
+    path = write_csv(tmp_path, [("2026-10-01", "ok", "-5.00"), ("2026-10-02", "bad", amount), ("2026-10-03", "ok", "7")])
+    batch, report = parse_statement(path, RecordStore())
+    assert (report["imported"], report["rejected"]) == (2, 1)
+    assert report["errors"][0].startswith("row 2:")
@@ -0,0 +1,104 @@
+import json
+import os
+
+import pytest
+
+import storage
+from ledger import RecordStore
+from storage import JsonStore
+
+
+def rec(desc, day="2026-10-01", amount=10.0):
+    return {"type": "Expense", "amount": amount, "category": "Food", "desc": desc, "date": day}
+
+
+def open_json(tmp_path, **kw):
+    return JsonStore(str(tmp_path / "data.json"), str(tmp_path / "settings.json"), **kw)
+
+
+def write_journal(tmp_path, entries, tail=b""):
+    with open(tmp_path / "data.journal", "wb") as f:
+        for e in entries: f.write((json.dumps(e) + "\n").encode())
+        f.write(tail)
+
+
+def test_round_trip_through_journal_and_snapshot(tmp_path):
+    store = open_json(tmp_path, compact_every=3)
+    store.load_records()
+    for i in range(7): store.add_records([rec(f"r{i}")])
+    store.delete_record(2)
+    store.close()
+    store = open_json(tmp_path)
+    assert [r["desc"] for r in store.load_records()] == ["r0", "r1", "r3", "r4", "r5", "r6"]
+    store.close()
+
+
+def test_small_batches_are_journaled_and_large_ones_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "JOURNAL_BATCH_MAX", 5)
+    store = open_json(tmp_path)
+    store.load_records()
+    store.add_batch(RecordStore([rec(f"big{i}") for i in range(6)]))
+    store.flush()
+    snapshot = os.path.getmtime(tmp_path / "data.json"), os.path.getsize(tmp_path / "data.json")
+    store.add_batch(RecordStore([rec(f"small{i}", amount=i + 0.25) for i in range(5)]))
+    store.close()
+    assert (os.path.getmtime(tmp_path / "data.json"), os.path.getsize(tmp_path / "data.json")) == snapshot
+    assert len((tmp_path / "data.journal").read_bytes().splitlines()) == 1
+    store = open_json(tmp_path)
+    records = store.load_records()
+    assert [r["desc"] for r in records] == [f"big{i}" for i in range(6)] + [f"small{i}" for i in range(5)]
+    assert records[-1]["amount"] == 4.25
+    store.close()
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    write_journal(tmp_path, [{"op": "add", "recs": [rec("a")], "seq": 1}], tail=b'{"op":"add","re')
+    store = open_json(tmp_path)
+    assert [r["desc"] for r in store.load_records()] == ["a"]
+    store.add_records([rec("b")])
+    store.close()
+    store = open_json(tmp_path)
+    assert [r["desc"] for r in store.load_records()] == ["a", "b"]
+    store.close()
+
+
+@pytest.mark.parametrize("bad", [
+    {"op": "add", "recs": [rec("bad", day="2026/10/02")], "seq": 2},
+    {"op": "del", "idx": 99, "seq": 2},
+    {"op": "add", "seq": 2},
+])
+def test_bad_entry_fails_the_load_and_nothing_is_written(tmp_path, bad):
+    write_journal(tmp_path, [{"op": "add", "recs": [rec("a")], "seq": 1}, bad, {"op": "add", "recs": [rec("c")], "seq": 3}])
+    before = (tmp_path / "data.journal").read_bytes()
+    store = open_json(tmp_path)
+    with pytest.raises(ValueError):
+        store.load_records()
+    assert store.load_error is not None
+    assert len(store.records) == 0 and len(store.uids) == 0
+    # What the app does next: a recurring catch-up, an import, an edit, a save.
+    store.add_records([rec("new")])
+    store.delete_record(0)
+    store.compact(wait=True)
+    store.close()
+    assert (tmp_path / "data.journal").read_bytes() == before
+    assert not (tmp_path / "data.json").exists()
+
+
+def test_garbage_line_in_the_middle_is_not_treated_as_a_torn_tail(tmp_path):
+    write_journal(tmp_path, [{"op": "add", "recs": [rec("a")], "seq": 1}], tail=b"garbage\n" + (json.dumps({"op": "add", "recs": [rec("c")], "seq": 2}) + "\n").encode())
+    size = os.path.getsize(tmp_path / "data.journal")
+    store = open_json(tmp_path)
+    with pytest.raises(ValueError):
+        store.load_records()
+    store.close()
+    assert os.path.getsize(tmp_path / "data.journal") == size
+
+
+def test_corrupt_snapshot_fails_the_load(tmp_path):
+    (tmp_path / "data.json").write_text('{"seq": 0, "records": [')
+    store = open_json(tmp_path)
+    with pytest.raises(ValueError):
+        store.load_records()
+    store.compact(wait=True)
+    store.close()
+    assert (tmp_path / "data.json").read_text() == '{"seq": 0, "records": ['
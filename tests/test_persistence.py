@@ -0,0 +1,137 @@
+import os
+import sqlite3
+
+import pytest
+
+from bench import synthetic_records
+from storage import JsonStore, SQLiteStore, migrate_to_sqlite
+
+N = 1000
+
+
+def open_store(tmp_path, backend):
+    if backend == "json": return JsonStore(str(tmp_path / "data.json"), str(tmp_path / "settings.json"))
+    return SQLiteStore(str(tmp_path / "finance.db"))
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_rapid_edits_coalesce_into_few_writes(tmp_path, backend):
+    recs = synthetic_records(N, seed=2)
+    store = open_store(tmp_path, backend)
+    store.load_records()
+    for i, r in enumerate(recs):
+        store.add_records([r])
+        if i % 10 == 0: store.save_settings({"currency": "$", "edits": i})
+    for _ in range(50): store.delete_record(0)
+    store.flush()
+    edits = N + N // 10 + 50
+    assert store.worker.writes < edits / 20
+    store.close()
+
+    store = open_store(tmp_path, backend)
+    assert list(store.load_records().iter_dicts()) == [dict(r, amount=round(r["amount"], 2)) for r in recs[50:]]
+    assert store.load_settings() == {"currency": "$", "edits": N - 10}
+    store.close()
+
+
+class FailingFsync:
+    def __init__(self, real, failures):
+        self.real, self.failures = real, failures
+
+    def __call__(self, fd):
+        if self.failures:
+            self.failures -= 1
+            raise OSError(28, "No space left on device")
+        return self.real(fd)
+
+
+def test_failed_journal_write_is_reported_and_kept_for_retry(tmp_path, monkeypatch):
+    store = open_store(tmp_path, "json")
+    store.load_records()
+    monkeypatch.setattr(os, "fsync", FailingFsync(os.fsync, 1))
+    store.add_records(synthetic_records(3, seed=1))
+    with pytest.raises(OSError):
+        store.flush()
+    # The lines that landed before fsync failed were cut off again.
+    assert not os.path.exists(tmp_path / "data.journal") or os.path.getsize(tmp_path / "data.journal") == 0
+    store.add_records(synthetic_records(2, seed=9))
+    store.flush()
+    store.close()
+    store = open_store(tmp_path, "json")
+    assert len(store.load_records()) == 5
+    store.close()
+
+
+def test_failed_write_is_raised_by_close_after_a_final_retry(tmp_path, monkeypatch):
+    store = open_store(tmp_path, "json")
+    store.load_records()
+    monkeypatch.setattr(os, "fsync", FailingFsync(os.fsync, 100))
+    store.add_records(synthetic_records(3, seed=1))
+    with pytest.raises(OSError):
+        store.close()
+    monkeypatch.undo()
+    store = open_store(tmp_path, "json")
+    assert len(store.load_records()) == 0
+    store.close()
+
+
+class FlakyConnection:
+    # Stands in for the store's sqlite3 connection and fails the first executemany.
+    def __init__(self, db):
+        self.db, self.failures = db, 1
+
+    def executemany(self, sql, rows):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self.db.executemany(sql, rows)
+
+    def __enter__(self): return self.db.__enter__()
+
+    def __exit__(self, *exc): return self.db.__exit__(*exc)
+
+    def __getattr__(self, name): return getattr(self.db, name)
+
+
+def test_failed_sqlite_batch_is_requeued(tmp_path):
+    store = open_store(tmp_path, "sqlite")
+    store.load_records()
+    store.db = FlakyConnection(store.db)
+    store.add_records(synthetic_records(4, seed=1))
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    store.retry()
+    store.flush()
+    store.db = store.db.db
+    store.close()
+    store = open_store(tmp_path, "sqlite")
+    assert len(store.load_records()) == 4
+    store.close()
+
+
+def migrate(tmp_path, **kw):
+    return migrate_to_sqlite(str(tmp_path / "data.json"), str(tmp_path / "settings.json"), str(tmp_path / "finance.db"), **kw)
+
+
+def test_migration_refuses_to_replace_a_database_in_use(tmp_path):
+    store = open_store(tmp_path, "json")
+    store.load_records()
+    store.add_records(synthetic_records(2, seed=1))
+    store.close()
+    assert migrate(tmp_path) == 2
+    store = open_store(tmp_path, "sqlite")
+    store.load_records()
+    store.add_records(synthetic_records(1, seed=2))
+    store.close()
+    with pytest.raises(ValueError, match="already holds records"):
+        migrate(tmp_path)
+    store = open_store(tmp_path, "sqlite")
+    assert len(store.load_records()) == 3
+    store.close()
+    assert migrate(tmp_path, force=True) == 2
+
+
+def test_migration_refuses_without_a_json_ledger(tmp_path):
+    with pytest.raises(ValueError, match="nothing to migrate"):
+        migrate(tmp_path)
+    assert not os.path.exists(tmp_path / "finance.db")
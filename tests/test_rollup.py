@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from bench import synthetic_records
+from ledger import RecordStore, Rollup
+from storage import JsonStore, SQLiteStore
+
+
+def test_sqlite_rollup_matches_the_database_and_catches_drift(tmp_path):
+    rng = random.Random(7)
+    recs = synthetic_records(3000, seed=7)
+    store = SQLiteStore(str(tmp_path / "finance.db"))
+    store.load_records()
+    store.add_records(recs[:2000])
+    for _ in range(200): store.delete_record(rng.randrange(len(store.records)))
+    store.add_records(recs[2000:])
+    assert store.verify_database() == []
+    uid = store.uids[0]
+    with store._db_lock, store.db: store.db.execute("UPDATE records SET amount = amount + 1 WHERE id = ?", (uid,))
+    month = store.records[0]["date"][:7]
+    assert {m for m, *_ in store.verify_database()} == {month, "ALL"}
+    store.close()
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_incremental_rollup_survives_random_edits(tmp_path, backend):
+    rng = random.Random(11)
+    recs = synthetic_records(4000, seed=11)
+    store = JsonStore(str(tmp_path / "data.json"), str(tmp_path / "settings.json"), compact_every=500) if backend == "json" else SQLiteStore(str(tmp_path / "finance.db"))
+    store.load_records()
+    pos = 0
+    for _ in range(300):
+        op = rng.random()
+        if op < 0.5:
+            k = rng.randrange(1, 8)
+            store.add_records(recs[pos:pos + k]); pos += k
+        elif op < 0.85 and len(store.records):
+            store.delete_record(rng.randrange(len(store.records)))
+        else:
+            k = rng.randrange(1, 60)
+            batch = RecordStore(recs[pos:pos + k]); pos += k
+            store.add_batch(batch, store.prepare_batch(batch) if rng.random() < 0.5 else None)
+    assert store.verify_rollup() == []
+    assert store.rollup.compare(Rollup(store.records.iter_dicts()).months) == []
+    if backend == "sqlite": assert store.verify_database() == []
+    expected = store.rollup.months
+    store.close()
+    store = JsonStore(str(tmp_path / "data.json"), str(tmp_path / "settings.json")) if backend == "json" else SQLiteStore(str(tmp_path / "finance.db"))
+    store.load_records()
+    assert store.rollup.months == expected
+    store.close()
+
+
+def test_verify_rollup_reports_and_repairs_drift():
+    store = JsonStore.__new__(JsonStore)
+    store.records = RecordStore(synthetic_records(200, seed=3))
+    store.rollup = Rollup(store.records)
+    store.rollup.add({"type": "Expense", "amount": 1.0, "category": "Food", "date": "2020-01-15"})
+    assert len(store.verify_rollup()) == 2
+    assert store.verify_rollup() == []
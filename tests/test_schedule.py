@@ -0,0 +1,105 @@
+import calendar
+import copy
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from schedule import catch_up, due_dates
+
+
+def flow(last_billed, period="monthly", anchor=None, desc="Netflix", amount=15.49):
+    item = {"type": "Expense", "amount": amount, "category": "Entertainment", "desc": desc, "last_billed": last_billed, "period": period}
+    if anchor: item["anchor"] = anchor
+    return item
+
+
+def iso(days):
+    return [date.fromordinal(d).isoformat() for d in days]
+
+
+def brute(item, today):
+    # Walks the calendar one day at a time and tests each day against the schedule.
+    anchor = date.fromisoformat(item.get("anchor") or item["last_billed"])
+    d, out = date.fromisoformat(item["last_billed"]) + timedelta(days=1), []
+    while d <= today:
+        if item["period"] == "weekly": due = (d - anchor).days % 7 == 0
+        elif item["period"] == "yearly" and d.month != anchor.month: due = False
+        else: due = d.day == min(anchor.day, calendar.monthrange(d.year, d.month)[1])
+        if due: out.append(d.toordinal())
+        d += timedelta(days=1)
+    return out
+
+
+def test_monthly_on_the_31st_clamps_to_month_end_without_drifting():
+    item = flow("2026-01-31")
+    assert iso(due_dates(item, date(2026, 6, 15))) == ["2026-02-28", "2026-03-31", "2026-04-30", "2026-05-31"]
+
+
+def test_yearly_on_feb_29_falls_on_feb_28_and_returns_in_leap_years():
+    item = flow("2024-02-29", "yearly")
+    assert iso(due_dates(item, date(2028, 12, 31))) == ["2025-02-28", "2026-02-28", "2027-02-28", "2028-02-29"]
+
+
+def test_weekly_keeps_its_weekday_across_a_long_gap():
+    item = flow("2026-01-05", "weekly")
+    days = due_dates(item, date(2026, 10, 18))
+    assert len(days) == 40
+    assert {date.fromordinal(d).weekday() for d in days} == {0}
+    assert iso(days)[:2] == ["2026-01-12", "2026-01-19"]
+
+
+def test_nothing_is_due_before_the_next_occurrence():
+    assert list(due_dates(flow("2026-10-18"), date(2026, 11, 17))) == []
+    assert list(due_dates(flow("2026-10-18", "weekly"), date(2026, 10, 24))) == []
+
+
+def test_legacy_flows_default_to_monthly_anchored_at_last_billed():
+    item = {"type": "Expense", "amount": 900, "category": "Rent", "desc": "Rent", "last_billed": "2026-04-10"}
+    batch = catch_up([item], date(2026, 10, 18))
+    assert [batch.iso(d) for d in batch.days] == ["2026-05-10", "2026-06-10", "2026-07-10", "2026-08-10", "2026-09-10", "2026-10-10"]
+    assert item["last_billed"] == "2026-10-10" and item["anchor"] == "2026-04-10"
+
+
+def test_due_dates_match_a_day_by_day_scan():
+    rng = random.Random(3)
+    for _ in range(1500):
+        anchor = date(2018, 1, 1) + timedelta(days=rng.randrange(2000))
+        item = flow((anchor + timedelta(days=rng.randrange(400))).isoformat(), rng.choice(["monthly", "weekly", "yearly"]), anchor.isoformat())
+        today = date.fromisoformat(item["last_billed"]) + timedelta(days=rng.randrange(1500))
+        assert list(due_dates(item, today)) == brute(item, today), (item, today)
+
+
+@pytest.mark.parametrize("start", [date(2024, 3, 1), date(2024, 2, 28)])
+def test_stepping_the_clock_daily_bills_the_same_as_one_catch_up(start):
+    flows = [flow("2024-01-31", desc="Netflix"), flow("2024-02-29", "yearly", desc="Box"), flow("2024-03-04", "weekly", desc="Gym", amount=20)]
+    end = date(2026, 10, 18)
+    once = copy.deepcopy(flows)
+    batch = catch_up(once, end)
+    daily, days, descs = copy.deepcopy(flows), [], []
+    clock = start
+    while clock <= end:
+        step = catch_up(daily, clock)
+        days += step.days
+        descs += step.descs
+        clock += timedelta(days=1)
+    assert days == list(batch.days) and descs == batch.descs
+    assert daily == once
+    # A second catch-up on the same day finds nothing left to bill.
+    assert len(catch_up(once, end)) == 0
+
+
+def test_catch_up_batch_is_in_date_order_across_flows():
+    flows = [flow("2025-01-15", "weekly", desc="a"), flow("2025-01-01", desc="b"), flow("2024-06-30", "yearly", desc="c")]
+    batch = catch_up(flows, date(2026, 10, 18))
+    assert list(batch.days) == sorted(batch.days)
+    assert all(d.startswith("AUTOPAY: ") for d in batch.descs)
+
+
+@pytest.mark.parametrize("bad", [{"period": "fortnightly"}, {"last_billed": "2026-13-01"}, {"amount": "abc"}])
+def test_a_bad_flow_leaves_every_flow_unbilled_and_unmoved(bad):
+    flows = [flow("2026-01-05"), flow("2026-02-10", "weekly", desc="gym"), dict(flow("2026-03-01", desc="broken"), **bad)]
+    before = copy.deepcopy(flows)
+    with pytest.raises((KeyError, ValueError)):
+        catch_up(flows, date(2026, 10, 18))
+    assert flows == before
@@ -0,0 +1,76 @@
+import random
+import sqlite3
+from array import array
+
+import pytest
+
+from bench import synthetic_records
+from ledger import RecordStore, tokenize, amount_token
+from storage import JsonStore, Matches, SQLiteStore
+
+
+def brute(store, query, rtype, category):
+    terms = tokenize(query or "")
+    out = []
+    for i in range(len(store.records) - 1, -1, -1):
+        r = store.records[i]
+        toks = tokenize(f"{r['desc']} {r['category']}") + [amount_token(store.records.cents[i])]
+        if any(not any(t.startswith(term) for t in toks) for term in terms): continue
+        if rtype != "All" and r['type'] != rtype: continue
+        if category != "All" and r['category'] != category: continue
+        out.append(i)
+    return out
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("ledger")
+    store = JsonStore(str(tmp / "data.json"), str(tmp / "settings.json"))
+    store.load_records()
+    store.add_records(synthetic_records(3000, seed=5))
+    rng = random.Random(5)
+    for _ in range(400): store.delete_record(rng.randrange(len(store.records)))
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("query", [None, "c", "1", "netflix", "cof lunch", "food 1", "zzz"])
+@pytest.mark.parametrize("rtype,category", [("All", "All"), ("Expense", "All"), ("All", "Food"), ("Expense", "Food"), ("Income", "Salary")])
+def test_match_equals_a_brute_force_scan(store, query, rtype, category):
+    rows = store.match(query, rtype, category)
+    assert list(rows) == brute(store, query, rtype, category)
+
+
+def test_keyword_matches_are_lazy_positions(store):
+    rows = store.match("c")
+    assert isinstance(rows, Matches)
+    expected = brute(store, "c", "All", "All")
+    assert len(rows) == len(expected)
+    assert [rows[i] for i in (0, 1, len(rows) // 2, -1)] == [expected[i] for i in (0, 1, len(expected) // 2, -1)]
+    assert rows[5:25] == expected[5:25]
+    assert list(reversed(rows)) == expected[::-1]
+
+
+def test_postings_stay_sorted_uid_arrays(store):
+    store.add_batch(RecordStore(synthetic_records(200, seed=8)))
+    store.add_records(synthetic_records(20, seed=9))
+    store.delete_record(len(store.records) // 2)
+    assert all(isinstance(uids, array) and list(uids) == sorted(set(uids)) for uids in store.search.postings.values())
+    assert list(store.match("c")) == brute(store, "c", "All", "All")
+
+
+def test_sqlite_filter_after_a_failed_load_uses_the_empty_columns(tmp_path):
+    db = str(tmp_path / "finance.db")
+    store = SQLiteStore(db)
+    store.load_records()
+    store.add_records(synthetic_records(50, seed=3))
+    store.close()
+    with sqlite3.connect(db) as conn:
+        conn.execute("INSERT INTO records (type, amount, category, desc, date) VALUES ('Expense', 1, 'Food', '', 'garbage')")
+    conn.close()
+    store = SQLiteStore(db)
+    with pytest.raises(ValueError):
+        store.load_records()
+    assert list(store.match(None, "Expense", "All")) == []
+    assert list(store.match(None, "All", "Food")) == []
+    store.close()